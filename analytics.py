@@ -0,0 +1,236 @@
+# --------------------------
+# Psychometric item & scale statistics
+# --------------------------
+# ItemStatistics keeps running sums over complete submissions (all 33 items
+# answered, raw 1-5 values in ITEMS order):
+#   n, per-item sums (33), cross-products (33 x 33), answer counts (33 x 5).
+# A new submission costs one outer product (O(items²)); a full recompute over
+# an answer matrix is a chunked X.T @ X. Everything reported -- Cronbach's
+# alpha, corrected item-total correlations, answer distributions and the
+# effect of reverse coding -- is derived from those sums, because reverse
+# coding (6 - x) is linear and can be applied to the moments afterwards.
+#
+# The app records each finished quiz into DATA_DIR/item_stats.npz;
+# `python analytics.py` prints the report, and `--from-archive` recomputes it
+# from the full response archive (archive.py).
+import argparse
+import json
+import logging
+import os
+
+import numpy as np
+
+from archive import ARCHIVE_DIR, ResponseArchive
+from profile_core import ITEMS, TRAITS, ITEM_TRAIT, REVERSE_MASK, DATA_DIR, file_lock
+
+log = logging.getLogger(__name__)
+
+STATS_PATH = os.path.join(DATA_DIR, "item_stats.npz")
+CHUNK_ROWS = 1_000_000
+
+
+class ItemStatistics:
+    def __init__(self, n_items=len(ITEMS)):
+        self.n = 0
+        self.sums = np.zeros(n_items)
+        self.cross = np.zeros((n_items, n_items))
+        self.counts = np.zeros((n_items, 5), dtype=np.int64)
+
+    # --------------------------
+    # Accumulation
+    # --------------------------
+    def update(self, row):
+        """Add one submission (33 raw answers); incomplete rows are ignored."""
+        x = np.asarray(row, dtype=np.float64)
+        if not (x > 0).all():
+            return False
+        self.n += 1
+        self.sums += x
+        self.cross += np.outer(x, x)
+        self.counts[np.arange(x.size), x.astype(np.int64) - 1] += 1
+        return True
+
+    def update_many(self, answers, chunk_rows=CHUNK_ROWS):
+        """Vectorized update from an (N, 33) answer matrix (may be a memmap), in bounded-memory chunks."""
+        if not isinstance(answers, np.ndarray):
+            answers = np.asarray(answers)
+        for start in range(0, answers.shape[0], chunk_rows):
+            chunk = np.asarray(answers[start:start + chunk_rows])
+            chunk = chunk[(chunk > 0).all(axis=1)]
+            if not len(chunk):
+                continue
+            x = chunk.astype(np.float64)
+            self.n += len(x)
+            self.sums += x.sum(axis=0)
+            self.cross += x.T @ x
+            for k in range(5):
+                self.counts[:, k] += (chunk == k + 1).sum(axis=0)
+        return self
+
+    @classmethod
+    def from_answers(cls, answers, chunk_rows=CHUNK_ROWS):
+        return cls().update_many(answers, chunk_rows)
+
+    def merge(self, other):
+        self.n += other.n
+        self.sums += other.sums
+        self.cross += other.cross
+        self.counts += other.counts
+        return self
+
+    # --------------------------
+    # Persistence
+    # --------------------------
+    def save(self, path=STATS_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, n=self.n, sums=self.sums, cross=self.cross, counts=self.counts)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=STATS_PATH):
+        stats = cls()
+        if os.path.exists(path):
+            with np.load(path) as data:
+                stats.n = int(data["n"])
+                stats.sums = data["sums"]
+                stats.cross = data["cross"]
+                stats.counts = data["counts"]
+        return stats
+
+    # --------------------------
+    # Statistics
+    # --------------------------
+    def covariance(self, keyed=True):
+        """Item covariance matrix, with reverse-coded items recoded (6 - x) when keyed."""
+        if self.n < 2:
+            raise ValueError("need at least two complete submissions")
+        sums, cross = self.sums, self.cross
+        if keyed:
+            # x' = a + b*x with (a, b) = (6, -1) for reversed items, (0, 1) otherwise
+            a = np.where(REVERSE_MASK, 6.0, 0.0)
+            b = np.where(REVERSE_MASK, -1.0, 1.0)
+            cross = (self.n * np.outer(a, a) + np.outer(a, b * sums) + np.outer(b * sums, a)
+                     + np.outer(b, b) * cross)
+            sums = self.n * a + b * sums
+        return (cross - np.outer(sums, sums) / self.n) / (self.n - 1)
+
+    def cronbach_alpha(self, keyed=True):
+        """Cronbach's alpha per trait: k/(k-1) * (1 - sum(item variances) / variance(total))."""
+        cov = self.covariance(keyed)
+        alphas = {}
+        for t, trait in enumerate(TRAITS):
+            idx = np.flatnonzero(ITEM_TRAIT == t)
+            k = len(idx)
+            sub = cov[np.ix_(idx, idx)]
+            total_var = sub.sum()
+            alphas[trait] = float(k / (k - 1) * (1 - np.trace(sub) / total_var)) if total_var > 0 else float("nan")
+        return alphas
+
+    def item_total_correlations(self, keyed=True):
+        """Corrected item-total correlation: each item against the sum of the other items in its trait."""
+        cov = self.covariance(keyed)
+        r = np.full(len(ITEMS), np.nan)
+        for t in range(len(TRAITS)):
+            idx = np.flatnonzero(ITEM_TRAIT == t)
+            sub = cov[np.ix_(idx, idx)]
+            cov_item_rest = sub.sum(axis=1) - np.diag(sub)
+            var_rest = sub.sum() - 2 * sub.sum(axis=1) + np.diag(sub)
+            denom = np.sqrt(np.diag(sub) * var_rest)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                r[idx] = np.where(denom > 0, cov_item_rest / denom, np.nan)
+        return r
+
+    def distributions(self):
+        """Share of each answer (1-5) per item."""
+        return self.counts / max(self.n, 1)
+
+    def report(self):
+        keyed_alpha = self.cronbach_alpha(keyed=True)
+        raw_alpha = self.cronbach_alpha(keyed=False)
+        keyed_r = self.item_total_correlations(keyed=True)
+        raw_r = self.item_total_correlations(keyed=False)
+        dist = self.distributions()
+        means = self.sums / self.n
+
+        items = []
+        for i, (trait, q) in enumerate(ITEMS):
+            items.append({
+                "trait": trait,
+                "item": q,
+                "reverse_coded": bool(REVERSE_MASK[i]),
+                "mean_raw": round(float(means[i]), 3),
+                "distribution": [round(float(p), 4) for p in dist[i]],
+                "item_total_r": _rounded(keyed_r[i]),
+                "item_total_r_without_reverse_coding": _rounded(raw_r[i]),
+            })
+
+        reversed_traits = {TRAITS[t] for t in ITEM_TRAIT[REVERSE_MASK]}
+        return {
+            "n": self.n,
+            "traits": {
+                t: {
+                    "alpha": _rounded(keyed_alpha[t]),
+                    "alpha_without_reverse_coding": _rounded(raw_alpha[t]) if t in reversed_traits else None,
+                }
+                for t in TRAITS
+            },
+            "items": items,
+        }
+
+
+def _rounded(x, digits=3):
+    """Round for the JSON report; undefined statistics (zero variance) become None."""
+    x = float(x)
+    return None if np.isnan(x) else round(x, digits)
+
+
+# --------------------------
+# Recording finished quizzes
+# --------------------------
+def record(row, path=STATS_PATH):
+    """Fold one finished submission into the stored running statistics."""
+    with file_lock(path):
+        stats = ItemStatistics.load(path)
+        if stats.update(row):
+            stats.save(path)
+
+
+def record_submission(row, timings=None):
+    """
+    Store a finished quiz in the running statistics and the response archive.
+    Called from the Finish button, so a failing write (corrupt stats file,
+    full or read-only disk) is logged rather than shown to the participant;
+    the other store is still written.
+    """
+    try:
+        record(row)
+    except Exception:
+        log.exception("could not update item statistics")
+    try:
+        ResponseArchive().append(row, timings=timings)
+    except Exception:
+        log.exception("could not append to the response archive")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Item and scale statistics for the Creative Identity Profile.")
+    parser.add_argument("--stats", default=STATS_PATH, help="running statistics file (default: %(default)s)")
+    parser.add_argument("--from-archive", nargs="?", const=ARCHIVE_DIR, metavar="DIR",
+                        help="recompute from the response archive (default: %(const)s)")
+    parser.add_argument("--from-npy", help="recompute from an (N, 33) int8 answer matrix saved with np.save")
+    args = parser.parse_args(argv)
+
+    if args.from_archive:
+        stats = ItemStatistics.from_answers(ResponseArchive(args.from_archive).answers)
+    elif args.from_npy:
+        stats = ItemStatistics.from_answers(np.load(args.from_npy, mmap_mode="r"))
+    else:
+        stats = ItemStatistics.load(args.stats)
+    if stats.n < 2:
+        parser.exit(1, f"only {stats.n} complete submission(s) recorded; need at least two\n")
+    print(json.dumps(stats.report(), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# --------------------------
+# Local HTTP scoring & report API
+# --------------------------
+# A small stdlib HTTP/1.1 service that exposes the same scoring, profile
+# interpretation and results PDF as the Streamlit app, for systems (e.g. an LMS)
+# that need to score many submissions without a browser session each.
+#
+# Run:  python api.py --host 127.0.0.1 --port 8502 --workers 4
+#
+# Endpoints (all POST bodies are JSON, batched as {"respondents": [...]}):
+#   GET  /health
+#   GET  /metrics    -> memory telemetry for the API process (see telemetry.py)
+#   POST /score      -> creative / Big Five percentages per respondent
+#   POST /interpret  -> percentages + levels, descriptions and archetypes
+#   POST /pdf        -> results PDFs (a single respondent may ask for raw PDF bytes);
+#                       served from pdf_cache.py when the same profile was rendered before
+#
+# A respondent is either
+#   {"id": "...", "answers": {"Originality": [4, 5, 3], ...}}   (1-5 per item, questionnaire order)
+#   {"id": "...", "responses": {"Originality_I often ...": "4 Agree", ...}}   (quiz widget keys)
+#   {"id": "...", "creative_perc": {...}, "bigfive_perc": {...}}   (already scored; /interpret and /pdf)
+# Answers are integers 1-5 or labels from ANSWER_LABELS ("4 Agree"); percentages
+# are integers 0-100. Anything else is reported as an error for that respondent.
+import argparse
+import base64
+import json
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pdf_cache
+import telemetry
+from profile_core import (
+    ANSWER_LABELS,
+    ITEMS,
+    creative_traits,
+    big_five_traits,
+    interpret_profile,
+    score_responses,
+)
+
+log = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+WIDGET_KEYS = {f"{trait}_{q}" for trait, q in ITEMS}
+
+
+# --------------------------
+# Request parsing
+# --------------------------
+def _object(value, what):
+    if not isinstance(value, dict):
+        raise TypeError(f"{what} must be a JSON object")
+    return value
+
+
+def _answer(value, where):
+    """One answer as its 1-5 value: an integer, or a label from ANSWER_LABELS."""
+    if isinstance(value, str) and value in ANSWER_LABELS:
+        return ANSWER_LABELS.index(value) + 1
+    if isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= 5:
+        return value
+    raise ValueError(f"{where}: answers must be integers from 1 to 5 or one of {ANSWER_LABELS}, got {value!r}")
+
+
+def _percent(value, where):
+    if isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 100:
+        return value
+    raise ValueError(f"{where}: percentages must be integers from 0 to 100, got {value!r}")
+
+
+def _responses_from_answers(answers):
+    """Turn {"Trait": [1-5, ...]} into the widget-keyed dict calculate_scores expects."""
+    responses = {}
+    for trait, qs in {**creative_traits, **big_five_traits}.items():
+        values = answers.get(trait)
+        if values is None:
+            continue
+        if not isinstance(values, list):
+            raise TypeError(f"{trait}: answers must be a JSON array")
+        if len(values) != len(qs):
+            raise ValueError(f"{trait}: expected {len(qs)} answers, got {len(values)}")
+        for q, v in zip(qs, values):
+            responses[f"{trait}_{q}"] = str(_answer(v, trait))
+    return responses
+
+
+def _responses_from_widgets(responses):
+    """Validate {"<Trait>_<question>": answer} (the quiz's widget keys); unanswered items may be null."""
+    checked = {}
+    for key, v in responses.items():
+        if key not in WIDGET_KEYS:
+            raise ValueError(f"unknown question key {key!r}")
+        if v is not None:
+            checked[key] = str(_answer(v, key))
+    return checked
+
+
+def _percentages(respondent):
+    """Return (creative_perc, bigfive_perc) for one respondent payload."""
+    if "creative_perc" in respondent and "bigfive_perc" in respondent:
+        creative = _object(respondent["creative_perc"], "creative_perc")
+        bigfive = _object(respondent["bigfive_perc"], "bigfive_perc")
+        creative_perc = {t: _percent(creative[t], t) for t in creative_traits}
+        bigfive_perc = {t: _percent(bigfive[t], t) for t in big_five_traits}
+        return creative_perc, bigfive_perc
+    if "answers" in respondent:
+        responses = _responses_from_answers(_object(respondent["answers"], "answers"))
+    elif "responses" in respondent:
+        responses = _responses_from_widgets(_object(respondent["responses"], "responses"))
+    else:
+        raise ValueError("respondent needs 'answers', 'responses' or 'creative_perc'/'bigfive_perc'")
+    creative_perc, bigfive_perc = score_responses(responses)
+    if len(creative_perc) != len(creative_traits):
+        raise ValueError("every creative trait needs at least one answer")
+    return creative_perc, bigfive_perc
+
+
+# --------------------------
+# HTTP handler
+# --------------------------
+class ProfileAPIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive by default
+    server_version = "CreativeIdentityProfileAPI/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type="application/json"):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            # the body is left unread, so it must not be parsed as the next request
+            self.close_connection = True
+            raise ValueError("request body too large")
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if isinstance(payload, list):
+            payload = {"respondents": payload}
+        _object(payload, "request body")
+        respondents = payload.get("respondents")
+        if respondents is None:
+            respondents = [payload]
+        if not isinstance(respondents, list):
+            raise TypeError("respondents must be a JSON array")
+        for r in respondents:
+            _object(r, "each respondent")
+        return payload, respondents
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send(200, {"status": "ok"})
+        elif self.path == "/metrics":
+            self._send(200, telemetry.snapshot())
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        routes = {"/score": self._score, "/interpret": self._interpret, "/pdf": self._pdf}
+        route = routes.get(self.path.split("?", 1)[0])
+        if route is None:
+            # the body is never read on this path, so don't reuse the connection
+            self.close_connection = True
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            payload, respondents = self._read_json()
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {"error": str(e) if not isinstance(e, KeyError) else f"missing {e}"})
+            return
+        try:
+            route(payload, respondents)
+        except Exception:
+            # e.g. a PDF worker died (BrokenProcessPool); answer instead of dropping the connection
+            log.exception("%s failed", self.path)
+            self._send(500, {"error": "internal error"})
+
+    def _each(self, respondents, fn):
+        results = []
+        for r in respondents:
+            rid = r.get("id")
+            try:
+                results.append({"id": rid, **fn(*_percentages(r))})
+            except (ValueError, KeyError, TypeError) as e:
+                results.append({"id": rid, "error": str(e)})
+        return results
+
+    def _score(self, payload, respondents):
+        self._send(200, {"results": self._each(
+            respondents, lambda c, b: {"creative_perc": c, "bigfive_perc": b})})
+
+    def _interpret(self, payload, respondents):
+        self._send(200, {"results": self._each(
+            respondents, lambda c, b: {"creative_perc": c, "bigfive_perc": b, **interpret_profile(c, b)})})
+
+    def _pdf(self, payload, respondents):
+        # Cached documents are served directly; only misses go to the rendering pool,
+        # and requests for a profile that is already rendering share that render.
+        cache = pdf_cache.default_cache()
+        pool = self.server.pool
+
+        def submit(creative_perc, bigfive_perc):
+            return pool.submit(pdf_cache.render_results_pdf, creative_perc, bigfive_perc)
+
+        jobs = []
+        for r in respondents:
+            try:
+                creative_perc, bigfive_perc = _percentages(r)
+            except (ValueError, KeyError, TypeError) as e:
+                jobs.append((r.get("id"), None, str(e)))
+                continue
+            try:
+                jobs.append((r.get("id"), cache.get_or_submit(creative_perc, bigfive_perc, submit), None))
+            except BrokenProcessPool:
+                self.server.reset_pool(pool)
+                raise
+
+        def result(pdf):
+            if isinstance(pdf, bytes):
+                return pdf
+            try:
+                return pdf.result()
+            except BrokenProcessPool:
+                self.server.reset_pool(pool)
+                raise
+
+        if len(jobs) == 1 and "respondents" not in payload and jobs[0][2] is None:
+            self._send(200, result(jobs[0][1]), content_type="application/pdf")
+            return
+
+        results = []
+        for rid, pdf, error in jobs:
+            if error is not None:
+                results.append({"id": rid, "error": error})
+            else:
+                results.append({"id": rid, "pdf_base64": base64.b64encode(result(pdf)).decode("ascii")})
+        self._send(200, {"results": results})
+
+
+class ProfileAPIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, workers=None, verbose=False):
+        super().__init__(address, ProfileAPIHandler)
+        self.workers = workers
+        self.verbose = verbose
+        self._pool_lock = threading.Lock()
+        self.pool = self._new_pool()
+
+    def _new_pool(self):
+        # spawn, like pdf_cache's pool: forking this threaded server could copy held locks
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=pdf_cache.init_render_worker)
+
+    def reset_pool(self, broken):
+        """Replace the rendering pool after a worker died (a broken pool rejects all work)."""
+        with self._pool_lock:
+            if self.pool is not broken:
+                return  # another request already replaced it
+            self.pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP API for Creative Identity Profile scoring and reports.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=None, help="PDF rendering processes (default: CPU count)")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    telemetry.start_tracemalloc()
+
+    server = ProfileAPIServer((args.host, args.port), workers=args.workers, verbose=args.verbose)
+    print(f"Creative Identity Profile API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+# --------------------------
+# Columnar response archive
+# --------------------------
+# Every finished quiz is appended to DATA_DIR/archive as fixed-width binary
+# columns, one file each, that open as np.memmap for zero-copy scans:
+#
+#   answers.int8       (N, 33)  raw 1-5 answers in ITEMS order
+#   submitted.float64  (N,)     unix time of submission
+#   timings.float32    (N, 33)  seconds spent per item (NaN when unknown; see events.py)
+#   percentages.int8   (N, 11)  trait percentages in TRAITS order
+#
+# answers.int8 is written last on append, so the row count is the number of
+# complete rows in it; a torn write in another column is ignored. meta.json
+# records the item and trait order the columns were written with.
+import json
+import os
+import time
+
+import numpy as np
+
+from profile_core import ITEMS, TRAITS, DATA_DIR, file_lock, score_matrix
+
+ARCHIVE_DIR = os.path.join(DATA_DIR, "archive")
+CHUNK_ROWS = 1_000_000
+
+COLUMNS = {
+    # name: (dtype, values per row)
+    "submitted": (np.float64, 1),
+    "timings": (np.float32, len(ITEMS)),
+    "percentages": (np.int8, len(TRAITS)),
+    "answers": (np.int8, len(ITEMS)),  # last: marks a row as complete
+}
+
+
+class ResponseArchive:
+    def __init__(self, path=ARCHIVE_DIR):
+        self.path = path
+
+    def _file(self, name):
+        dtype, _ = COLUMNS[name]
+        return os.path.join(self.path, f"{name}.{np.dtype(dtype).name}")
+
+    def _write_meta(self):
+        meta = os.path.join(self.path, "meta.json")
+        if not os.path.exists(meta):
+            with open(meta, "w") as f:
+                json.dump({"items": [list(item) for item in ITEMS], "traits": TRAITS,
+                           "columns": {n: [np.dtype(d).name, w] for n, (d, w) in COLUMNS.items()}}, f, indent=2)
+
+    def _rows_on_disk(self, name):
+        path = self._file(name)
+        if not os.path.exists(path):
+            return 0
+        dtype, width = COLUMNS[name]
+        return os.path.getsize(path) // (np.dtype(dtype).itemsize * width)
+
+    def __len__(self):
+        return self._rows_on_disk("answers")
+
+    # --------------------------
+    # Appending
+    # --------------------------
+    def append(self, answers, submitted=None, timings=None, percentages=None):
+        """
+        Append one row or a batch: answers is (33,) or (k, 33) raw answers.
+        Missing columns are filled in: submitted with now, timings with NaN,
+        percentages by scoring the answers.
+        """
+        answers = np.atleast_2d(np.asarray(answers, dtype=np.int8))
+        k = answers.shape[0]
+        if answers.shape[1] != len(ITEMS):
+            raise ValueError(f"expected {len(ITEMS)} answers per row, got {answers.shape[1]}")
+        values = {
+            "answers": answers,
+            "submitted": np.full(k, time.time()) if submitted is None else np.broadcast_to(submitted, (k,)),
+            "timings": np.full((k, len(ITEMS)), np.nan) if timings is None else np.atleast_2d(timings),
+            "percentages": score_matrix(answers) if percentages is None else np.atleast_2d(percentages),
+        }
+
+        os.makedirs(self.path, exist_ok=True)
+        with file_lock(os.path.join(self.path, "append")):
+            self._write_meta()
+            n = len(self)
+            for name, (dtype, width) in COLUMNS.items():
+                # truncate anything left over from an interrupted append before writing,
+                # including a partial trailing row (which _rows_on_disk rounds away)
+                path = self._file(name)
+                size = n * np.dtype(dtype).itemsize * width
+                if (os.path.getsize(path) if os.path.exists(path) else 0) != size:
+                    with open(path, "ab") as f:
+                        f.truncate(size)
+                with open(path, "ab") as f:
+                    f.write(np.ascontiguousarray(values[name], dtype=dtype).tobytes())
+        return n + k
+
+    # --------------------------
+    # Reading
+    # --------------------------
+    def column(self, name, rows=None):
+        """Read-only memmap of a column, shaped (N,) or (N, width); N defaults to the committed row count."""
+        dtype, width = COLUMNS[name]
+        n = len(self) if rows is None else rows
+        shape = (n,) if width == 1 else (n, width)
+        if n == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self._file(name), dtype=dtype, mode="r", shape=shape)
+
+    @property
+    def answers(self):
+        return self.column("answers")
+
+    @property
+    def submitted(self):
+        return self.column("submitted")
+
+    @property
+    def timings(self):
+        return self.column("timings")
+
+    @property
+    def percentages(self):
+        return self.column("percentages")
+
+    def chunks(self, *names, chunk_rows=CHUNK_ROWS):
+        """Yield tuples of column slices (memmap views), chunk_rows at a time, over a consistent row count."""
+        n = len(self)
+        columns = [self.column(name, n) for name in names]
+        for start in range(0, n, chunk_rows):
+            stop = min(start + chunk_rows, n)
+            yield tuple(np.asarray(c[start:stop]) for c in columns)
+
+    # --------------------------
+    # Scans
+    # --------------------------
+    def rescore(self, chunk_rows=CHUNK_ROWS):
+        """Re-score every stored answer row; returns an (N, 11) int8 array (e.g. after a scoring change)."""
+        out = np.empty((len(self), len(TRAITS)), dtype=np.int8)
+        start = 0
+        for (answers,) in self.chunks("answers", chunk_rows=chunk_rows):
+            out[start:start + len(answers)] = score_matrix(answers)
+            start += len(answers)
+        return out
+
+    def norms(self, since=None, until=None, chunk_rows=CHUNK_ROWS):
+        """
+        Percentile norms per trait: {trait: array of 101 values}, where entry p
+        is the share of respondents scoring <= p percent.
+        """
+        counts = np.zeros((len(TRAITS), 101), dtype=np.int64)
+        for submitted, perc in self.chunks("submitted", "percentages", chunk_rows=chunk_rows):
+            perc = perc[_window(submitted, since, until)]
+            for t in range(len(TRAITS)):
+                counts[t] += np.bincount(perc[:, t], minlength=101)
+        totals = counts.sum(axis=1, keepdims=True)
+        cdf = np.cumsum(counts, axis=1) / np.maximum(totals, 1)
+        return {trait: cdf[t] for t, trait in enumerate(TRAITS)}
+
+    def cohort_stats(self, since=None, until=None, chunk_rows=CHUNK_ROWS):
+        """Count, mean and standard deviation of each trait percentage for submissions in [since, until)."""
+        n = 0
+        s1 = np.zeros(len(TRAITS))
+        s2 = np.zeros(len(TRAITS))
+        for submitted, perc in self.chunks("submitted", "percentages", chunk_rows=chunk_rows):
+            perc = perc[_window(submitted, since, until)].astype(np.float64)
+            n += len(perc)
+            s1 += perc.sum(axis=0)
+            s2 += (perc ** 2).sum(axis=0)
+        mean = s1 / max(n, 1)
+        std = np.sqrt(np.maximum(s2 / max(n, 1) - mean ** 2, 0))
+        return {"n": n, "traits": {t: {"mean": round(float(mean[i]), 2), "std": round(float(std[i]), 2)}
+                                   for i, t in enumerate(TRAITS)}}
+
+
+def _window(submitted, since, until):
+    mask = np.ones(len(submitted), dtype=bool)
+    if since is not None:
+        mask &= submitted >= since
+    if until is not None:
+        mask &= submitted < until
+    return mask
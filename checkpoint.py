@@ -0,0 +1,187 @@
+# --------------------------
+# Quiz checkpoints & idle-session eviction
+# --------------------------
+# Quiz progress (page, current question, question order and answers) is
+# saved to the session backend (session_store.py; local files by default)
+# after every quiz rerun; the token is kept in the ?resume= query parameter so
+# a returning browser -- or another app process -- can pick up where it left off.
+#
+# Sessions idle for longer than CIP_SESSION_TTL seconds (default 900) have
+# their quiz state dropped from memory; the next rerun from that browser
+# restores it from the checkpoint, so memory is bounded by active users.
+# Stored checkpoints themselves are pruned after CIP_CHECKPOINT_TTL (see
+# session_store.py).
+import logging
+import os
+import secrets
+import struct
+import threading
+import time
+
+import telemetry
+from session_store import get_store, valid_token
+from profile_core import ITEMS, ANSWER_LABELS, answers_row
+
+log = logging.getLogger(__name__)
+
+SESSION_TTL = float(os.environ.get("CIP_SESSION_TTL", 900))
+SWEEP_INTERVAL = 60  # seconds between eviction sweeps
+PRUNE_INTERVAL = 3600  # seconds between deleting expired checkpoints from the backend
+
+# Session-state keys that make up quiz progress, plus the radio widget keys.
+QUIZ_KEYS = ("page", "current_question", "shuffled_questions", "responses", "resume_token")
+WIDGET_KEYS = tuple(f"{trait}_{q}" for trait, q in ITEMS)
+
+_VERSION = 1
+_PAGES = ("intro", "quiz", "results")
+_HEADER = struct.Struct("<BBBB")  # version, page, current question, number of shuffled items
+
+_ITEM_INDEX = {item: i for i, item in enumerate(ITEMS)}
+
+_lock = threading.Lock()
+_live = {}          # session id -> (the session's SessionState, last seen)
+_last_sweep = 0.0
+_last_prune = 0.0
+
+
+# --------------------------
+# Compact encoding
+# --------------------------
+def encode(state):
+    """Pack quiz progress into ~70 bytes: header, question order, one byte per answer (0 = unanswered)."""
+    order = bytes(_ITEM_INDEX[tuple(item)] for item in state.get("shuffled_questions") or [])
+    answers = answers_row(state.get("responses") or {}).tobytes()
+    header = _HEADER.pack(_VERSION, _PAGES.index(state.get("page", "intro")),
+                          state.get("current_question", 0), len(order))
+    return header + order + answers
+
+
+def decode(blob):
+    """Inverse of encode(); returns the session-state values to restore."""
+    version, page, current, n_order = _HEADER.unpack_from(blob)
+    if version != _VERSION:
+        raise ValueError(f"unsupported checkpoint version {version}")
+    offset = _HEADER.size
+    order = blob[offset:offset + n_order]
+    answers = blob[offset + n_order:offset + n_order + len(ITEMS)]
+    state = {
+        "page": _PAGES[page],
+        "current_question": current,
+        "responses": {WIDGET_KEYS[i]: ANSWER_LABELS[a - 1] for i, a in enumerate(answers) if a},
+    }
+    if order:
+        state["shuffled_questions"] = [ITEMS[i] for i in order]
+    return state
+
+
+# --------------------------
+# Saving & loading
+# --------------------------
+def new_token():
+    return secrets.token_urlsafe(12)
+
+
+def save(token, state, flush=False):
+    """
+    Queue the encoded progress for the backend; flush=True writes it before
+    returning. Returns False if that write failed: the error is logged and the
+    write stays queued for the background flush, so the quiz carries on.
+    """
+    if not valid_token(token):
+        return False
+    try:
+        get_store().put(token, encode(state), flush=flush)
+    except Exception:
+        log.exception("could not save quiz checkpoint")
+        return False
+    return True
+
+
+def load(token):
+    """Return the saved progress for token, or None if there is none (or the backend is unavailable)."""
+    if not valid_token(token):
+        return None
+    try:
+        blob = get_store().get(token)
+    except Exception:
+        log.exception("could not load quiz checkpoint")
+        return None  # start afresh rather than failing the page
+    if blob is None:
+        return None
+    try:
+        state = decode(blob)
+    except (ValueError, IndexError, struct.error):
+        return None
+    state["resume_token"] = token
+    return state
+
+
+# --------------------------
+# Idle eviction
+# --------------------------
+def track(ctx):
+    """Note that the session behind this ScriptRunContext just reran."""
+    if ctx is None:
+        return
+    # ctx.session_state is a SafeSessionState wrapper owned by this rerun's
+    # ScriptRunner and dropped with it; the SessionState inside lives as long
+    # as the session. It cannot be weakly referenced, so the entry holds it
+    # until the first sweep after the TTL, which drops the entry either way.
+    with _lock:
+        _live[ctx.session_id] = (ctx.session_state._state, time.time())
+
+
+def _evict(state):
+    # The session has been idle for the whole TTL, so no script run of its own
+    # is touching the state while its keys are deleted here.
+    if "resume_token" not in state:
+        return False  # nothing to restore from; leave it alone
+    for key in QUIZ_KEYS + WIDGET_KEYS:
+        if key in state:
+            del state[key]
+    return True
+
+
+def sweep(ttl=SESSION_TTL):
+    """Drop quiz state from sessions idle for more than ttl seconds; returns how many were evicted."""
+    cutoff = time.time() - ttl
+    with _lock:
+        idle = [(sid, state) for sid, (state, seen) in _live.items() if seen < cutoff]
+        for sid, _ in idle:
+            del _live[sid]
+
+    evicted = 0
+    for sid, state in idle:
+        if _evict(state):
+            evicted += 1
+        telemetry.forget_session(sid)
+    return evicted
+
+
+def prune():
+    """Delete stored checkpoints older than CIP_CHECKPOINT_TTL; returns how many."""
+    try:
+        return get_store().prune()
+    except Exception:
+        log.exception("could not prune old quiz checkpoints")
+        return 0
+
+
+def maybe_sweep():
+    """
+    Run sweep() at most once every SWEEP_INTERVAL seconds per process, and
+    prune() at most once every PRUNE_INTERVAL (in the background: it lists
+    every stored checkpoint).
+    """
+    global _last_sweep, _last_prune
+    now = time.time()
+    with _lock:
+        if now - _last_sweep < SWEEP_INTERVAL:
+            return 0
+        _last_sweep = now
+        prune_now = now - _last_prune >= PRUNE_INTERVAL
+        if prune_now:
+            _last_prune = now
+    if prune_now:
+        threading.Thread(target=prune, name="cip-checkpoint-prune", daemon=True).start()
+    return sweep()
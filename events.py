@@ -0,0 +1,281 @@
+# --------------------------
+# Quiz event capture & data-quality screening
+# --------------------------
+# Each quiz session gets a SessionEvents recorder in st.session_state. A rerun
+# only appends a tuple to the session's bounded ring (collections.deque, a few
+# hundred nanoseconds); a background thread drains every ring every
+# CIP_EVENTS_FLUSH seconds (default 1.0) and appends the batch to
+# DATA_DIR/events.bin as fixed-width records (EVENT_DTYPE, readable with
+# read_events() / np.memmap). A ring that overflows before a flush drops its
+# oldest events; the count shows up in stats().
+#
+# Per-item time on screen (summed over visits) is also kept on the recorder
+# and stored in the archive's timings column when the quiz is finished, so
+# screen() can flag speeders and straight-liners over the whole archive:
+#
+#   python events.py --screen [ARCHIVE_DIR]
+import argparse
+import atexit
+import collections
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from profile_core import ITEMS, DATA_DIR, file_lock
+
+log = logging.getLogger(__name__)
+
+EVENTS_PATH = os.path.join(DATA_DIR, "events.bin")
+FLUSH_INTERVAL = float(os.environ.get("CIP_EVENTS_FLUSH", 1.0))
+RING_SIZE = 512         # events kept per session between flushes
+IDLE_RING_SECONDS = 3600
+
+KINDS = ("show", "answer", "next", "back", "finish")
+_KIND = {kind: i for i, kind in enumerate(KINDS)}
+_ITEM_INDEX = {item: i for i, item in enumerate(ITEMS)}
+
+EVENT_DTYPE = np.dtype([
+    ("time", "<f8"),        # unix time
+    ("session", "S16"),     # resume token
+    ("kind", "u1"),         # index into KINDS
+    ("item", "i1"),         # index into ITEMS
+    ("answer", "i1"),       # 1-5, 0 when not an answer event
+    ("seconds", "<f4"),     # answer: since the item was shown; next/back/finish: time on the item
+])
+
+_lock = threading.Lock()
+_rings = {}             # token -> SessionEvents with events not yet written
+_written = 0
+_dropped = 0
+
+
+# --------------------------
+# Recording
+# --------------------------
+class SessionEvents:
+    """Per-session recorder; keep one in st.session_state."""
+
+    def __init__(self, token):
+        self.token = token
+        self.ring = collections.deque(maxlen=RING_SIZE)
+        self.dropped = 0
+        self.last = time.time()
+        self.timings = np.full(len(ITEMS), np.nan, dtype=np.float32)  # seconds on screen per item
+        self.item = None
+        self.shown_at = None
+        with _lock:
+            _rings[token] = self
+
+    def _add(self, now, kind, item, answer=0, seconds=np.nan):
+        if len(self.ring) == RING_SIZE:
+            self.dropped += 1
+        self.ring.append((now, self.token, _KIND[kind], item, answer, seconds))
+        self.last = now
+        _writer.wake()
+
+    def view(self, trait, question):
+        """Call on every quiz rerun; records a show event when the displayed item changed."""
+        item = _ITEM_INDEX[(trait, question)]
+        if item != self.item:
+            self.item = item
+            self.shown_at = time.time()
+            self._add(self.shown_at, "show", item)
+
+    def answer(self, label):
+        """Record an answer change (label from ANSWER_LABELS) with its latency since the item was shown."""
+        if self.item is None or not label:
+            return
+        now = time.time()
+        self._add(now, "answer", self.item, int(label[0]), now - self.shown_at)
+
+    def leave(self, kind):
+        """Record Next / Back / Finish and add the time spent on the current item to timings."""
+        if self.item is None:
+            return
+        now = time.time()
+        seconds = now - self.shown_at
+        previous = self.timings[self.item]
+        self.timings[self.item] = seconds if np.isnan(previous) else previous + seconds
+        self._add(now, kind, self.item, seconds=seconds)
+        self.item = None
+
+
+def recorder(state):
+    """The SessionEvents for this session state, created on first use (None without a resume token)."""
+    events = state.get("quiz_events")
+    token = state.get("resume_token")
+    if events is None or events.token != token:
+        if not token:
+            return None
+        events = state["quiz_events"] = SessionEvents(token)
+    return events
+
+
+# --------------------------
+# Batched writes
+# --------------------------
+def _drain():
+    global _dropped
+    now = time.time()
+    with _lock:
+        rings = list(_rings.items())
+    batch = []
+    for token, events in rings:
+        ring = events.ring
+        for _ in range(len(ring)):
+            batch.append(ring.popleft())
+        if events.dropped:
+            with _lock:
+                _dropped += events.dropped
+            events.dropped = 0
+        if not ring and now - events.last > IDLE_RING_SECONDS:
+            with _lock:
+                if _rings.get(token) is events:
+                    del _rings[token]
+    return batch
+
+
+def flush(path=None):
+    """Write every buffered event now; returns the number written."""
+    global _written
+    path = path or EVENTS_PATH
+    with _writer.flush_lock:
+        batch = _drain()
+        if not batch:
+            return 0
+        records = np.array(batch, dtype=EVENT_DTYPE)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with file_lock(path):
+            with open(path, "ab") as f:
+                f.write(records.tobytes())
+        with _lock:
+            _written += len(records)
+        return len(records)
+
+
+class _Writer:
+    def __init__(self):
+        self.flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        if self._thread is None:
+            self._start()
+        if not self._wake.is_set():
+            self._wake.set()
+
+    def _start(self):
+        with self.flush_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="cip-event-writer", daemon=True)
+                self._thread.start()
+                atexit.register(flush)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(FLUSH_INTERVAL)
+            self._wake.clear()
+            try:
+                flush()
+            except Exception:
+                log.exception("could not write quiz events to %s", EVENTS_PATH)
+                time.sleep(1)
+
+
+_writer = _Writer()
+
+
+def stats():
+    with _lock:
+        buffered = sum(len(events.ring) for events in _rings.values())
+        return {"sessions_buffered": len(_rings), "events_buffered": buffered,
+                "events_written": _written, "events_dropped": _dropped}
+
+
+def read_events(path=None):
+    """All logged events as a structured array (EVENT_DTYPE), memory-mapped."""
+    path = path or EVENTS_PATH
+    if not os.path.exists(path) or os.path.getsize(path) < EVENT_DTYPE.itemsize:
+        return np.empty(0, dtype=EVENT_DTYPE)
+    return np.memmap(path, dtype=EVENT_DTYPE, mode="r", shape=(os.path.getsize(path) // EVENT_DTYPE.itemsize,))
+
+
+# --------------------------
+# Screening
+# --------------------------
+def screen(answers, timings, min_item_seconds=1.0, speed_ratio=0.4, max_modal_share=0.9, min_std=0.35):
+    """
+    Flag suspicious submissions in bulk; answers is (N, 33) 1-5, timings (N, 33)
+    seconds per item (NaN when unknown). Returns a dict of (N,) arrays:
+      speeder         median item time below min_item_seconds, or total time
+                      below speed_ratio times the median total of the batch
+      straight_liner  one answer used for more than max_modal_share of items,
+                      or answer standard deviation below min_std
+      suspicious      either flag
+    plus the underlying total_seconds, modal_share and answer_std.
+    Rows without complete timings are never flagged as speeders.
+    """
+    answers = np.asarray(answers)
+    timings = np.asarray(timings, dtype=np.float32)
+
+    timed = ~np.isnan(timings).any(axis=1)
+    total = timings.sum(axis=1)
+    median_item = np.median(np.where(timed[:, None], timings, 0), axis=1)
+    typical_total = np.median(total[timed]) if timed.any() else np.nan
+    speeder = timed & ((median_item < min_item_seconds) | (total < speed_ratio * typical_total))
+
+    counts = np.stack([(answers == a).sum(axis=1) for a in range(1, 6)], axis=1)
+    modal_share = counts.max(axis=1) / answers.shape[1]
+    answer_std = answers.std(axis=1, dtype=np.float32)
+    straight_liner = (modal_share > max_modal_share) | (answer_std < min_std)
+
+    return {
+        "speeder": speeder,
+        "straight_liner": straight_liner,
+        "suspicious": speeder | straight_liner,
+        "total_seconds": total,
+        "modal_share": modal_share,
+        "answer_std": answer_std,
+    }
+
+
+def screen_archive(archive, chunk_rows=None, **thresholds):
+    """Run screen() over a ResponseArchive chunk by chunk; returns the flag arrays for every row."""
+    from archive import CHUNK_ROWS
+    parts = [screen(answers, timings, **thresholds)
+             for answers, timings in archive.chunks("answers", "timings", chunk_rows=chunk_rows or CHUNK_ROWS)]
+    if not parts:
+        return screen(np.empty((0, len(ITEMS)), dtype=np.int8), np.empty((0, len(ITEMS)), dtype=np.float32))
+    return {key: np.concatenate([p[key] for p in parts]) for key in parts[0]}
+
+
+def main(argv=None):
+    from archive import ARCHIVE_DIR, ResponseArchive
+    parser = argparse.ArgumentParser(description="Data-quality screening of archived quiz submissions.")
+    parser.add_argument("--screen", nargs="?", const=ARCHIVE_DIR, default=ARCHIVE_DIR, metavar="DIR",
+                        help="response archive to screen (default: %(const)s)")
+    parser.add_argument("--min-item-seconds", type=float, default=1.0)
+    parser.add_argument("--speed-ratio", type=float, default=0.4)
+    parser.add_argument("--max-modal-share", type=float, default=0.9)
+    parser.add_argument("--min-std", type=float, default=0.35)
+    args = parser.parse_args(argv)
+
+    flags = screen_archive(ResponseArchive(args.screen), min_item_seconds=args.min_item_seconds,
+                           speed_ratio=args.speed_ratio, max_modal_share=args.max_modal_share,
+                           min_std=args.min_std)
+    n = len(flags["suspicious"])
+    print(json.dumps({
+        "submissions": n,
+        **{key: int(flags[key].sum()) for key in ("speeder", "straight_liner", "suspicious")},
+        "suspicious_rows": np.flatnonzero(flags["suspicious"]).tolist()[:1000],
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
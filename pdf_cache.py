@@ -0,0 +1,297 @@
+# --------------------------
+# Results PDF cache
+# --------------------------
+# Each trait percentage can only take a handful of values, so many people get
+# exactly the same results PDF. Finished PDF bytes are cached under
+# sha256(creative_perc, bigfive_perc, TEMPLATE_VERSION, variant) in
+#   - a bounded in-memory LRU (CIP_PDF_CACHE_ITEMS entries, default 256), and
+#   - optionally a shared on-disk tier (CIP_PDF_CACHE_DIR), trimmed oldest-first
+#     to CIP_PDF_CACHE_DISK_MB (default 256) so several processes can share it.
+# Concurrent requests for the same key render it once.
+#
+# Bump TEMPLATE_VERSION whenever create_results_pdf or the trait/archetype
+# text changes, so stale documents are never served.
+#
+# CIP_PDF_OPTIMIZE=1 renders with the size-optimized output of profile_core
+# (compact charts and raw Flate streams), and CIP_PDF_MAX_BYTES (implies it)
+# lowers chart resolution until each document fits. Both are part of the
+# cache key. Optimized documents are rendered in a small pool of worker
+# processes (CIP_PDF_WORKERS, default 2) set up with use_raw_streams(),
+# because that ReportLab setting is process-wide.
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from profile_core import (
+    create_academic_pdf,
+    create_results_pdf,
+    fit_results_pdf,
+    use_raw_streams,
+    trait_descriptions,
+    archetypes,
+)
+
+TEMPLATE_VERSION = "1"
+MAX_BYTES = int(os.environ.get("CIP_PDF_MAX_BYTES", 0)) or None
+OPTIMIZE = os.environ.get("CIP_PDF_OPTIMIZE") == "1" or MAX_BYTES is not None
+OUTPUT_MODE = f"optimized:{MAX_BYTES or ''}" if OPTIMIZE else "default"
+
+
+def cache_key(creative_perc, bigfive_perc, variant=""):
+    payload = json.dumps([sorted(creative_perc.items()), sorted(bigfive_perc.items()), TEMPLATE_VERSION,
+                          OUTPUT_MODE, variant], separators=(",", ":"), default=int)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def init_render_worker():
+    """Initializer for processes that run render_results_pdf / render_academic_pdf."""
+    if OPTIMIZE:
+        use_raw_streams()
+
+
+def render_results_pdf(creative_perc, bigfive_perc):
+    if OPTIMIZE:
+        return fit_results_pdf(creative_perc, bigfive_perc, trait_descriptions, archetypes, MAX_BYTES)[0]
+    return create_results_pdf(creative_perc, bigfive_perc, trait_descriptions, archetypes).getvalue()
+
+
+def render_academic_pdf():
+    return create_academic_pdf().getvalue()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def render_pool():
+    """Worker processes for optimized renders (spawned, so no threads are forked)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=int(os.environ.get("CIP_PDF_WORKERS", 2)),
+                                        mp_context=multiprocessing.get_context("spawn"),
+                                        initializer=init_render_worker)
+        return _pool
+
+
+def _render(fn, *args):
+    # in-process for the default mode; optimized documents need a raw-stream worker
+    if OPTIMIZE:
+        return render_pool().submit(fn, *args).result()
+    return fn(*args)
+
+
+class PDFCache:
+    def __init__(self, max_items=256, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._inflight = {}     # key -> Event for get_or_render
+        self._submitted = {}    # key -> Future for get_or_submit
+        self._lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(e.stat().st_size for e in os.scandir(disk_dir) if e.name.endswith(".pdf"))
+
+    # --------------------------
+    # Tiers
+    # --------------------------
+    def _remember(self, key, pdf):
+        self._memory[key] = pdf
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key + ".pdf")
+
+    def _disk_get(self, key):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                pdf = f.read()
+            os.utime(path)  # mark as recently used for eviction
+            return pdf
+        except FileNotFoundError:
+            return None
+
+    def _disk_put(self, key, pdf):
+        if not self.disk_dir or len(pdf) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(pdf)
+        try:
+            replaced = os.path.getsize(path)  # rewriting a key must not count it twice
+        except FileNotFoundError:
+            replaced = 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._disk_bytes += len(pdf) - replaced
+            over = self._disk_bytes > self.disk_max_bytes
+        if over:
+            self._trim_disk()
+
+    def _trim_disk(self):
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".pdf"):
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:  # removed by another process
+                    continue
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        target = self.disk_max_bytes * 0.9  # leave headroom so we don't trim on every write
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._disk_bytes = total
+
+    # --------------------------
+    # Lookup
+    # --------------------------
+    def get(self, key):
+        with self._lock:
+            pdf = self._memory.get(key)
+            if pdf is not None:
+                self._memory.move_to_end(key)
+                self.hits_memory += 1
+                return pdf
+        pdf = self._disk_get(key)
+        if pdf is not None:
+            with self._lock:
+                self.hits_disk += 1
+                self._remember(key, pdf)
+        return pdf
+
+    def put(self, key, pdf):
+        with self._lock:
+            self._remember(key, pdf)
+        self._disk_put(key, pdf)
+
+    def get_or_render(self, creative_perc, bigfive_perc, render=render_results_pdf, variant=""):
+        """Return cached PDF bytes, calling render(creative_perc, bigfive_perc) on a miss."""
+        key = cache_key(creative_perc, bigfive_perc, variant)
+        pdf = self.get(key)
+        if pdf is not None:
+            return pdf
+
+        with self._lock:
+            event = self._inflight.get(key)
+            owner = event is None
+            if owner:
+                event = self._inflight[key] = threading.Event()
+                self.misses += 1
+        if not owner:
+            event.wait()
+            pdf = self.get(key)
+            if pdf is not None:
+                return pdf
+            return self.get_or_render(creative_perc, bigfive_perc, render, variant)  # the owner failed
+
+        try:
+            pdf = render(creative_perc, bigfive_perc)
+            self.put(key, pdf)
+            return pdf
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def get_or_submit(self, creative_perc, bigfive_perc, submit, variant=""):
+        """
+        Asynchronous get_or_render: return cached PDF bytes, or a Future for the
+        render. submit(creative_perc, bigfive_perc) must start the render and
+        return a concurrent.futures.Future; callers asking for a key that is
+        already being rendered share its Future, and the result is cached when
+        it completes.
+        """
+        key = cache_key(creative_perc, bigfive_perc, variant)
+        pdf = self.get(key)
+        if pdf is not None:
+            return pdf
+
+        with self._lock:
+            future = self._submitted.get(key)
+            if future is not None:
+                return future
+            future = self._submitted[key] = submit(creative_perc, bigfive_perc)
+            self.misses += 1
+        future.add_done_callback(lambda f: self._submitted_done(key, f))
+        return future
+
+    def _submitted_done(self, key, future):
+        try:
+            if not future.cancelled() and future.exception() is None:
+                self.put(key, future.result())
+        finally:
+            with self._lock:
+                self._submitted.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            hits = self.hits_memory + self.hits_disk
+            lookups = hits + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                "memory_items": len(self._memory),
+                "memory_bytes": sum(len(p) for p in self._memory.values()),
+                "disk_bytes": self._disk_bytes if self.disk_dir else None,
+            }
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    """Process-wide cache configured from the environment."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = PDFCache(
+                max_items=int(os.environ.get("CIP_PDF_CACHE_ITEMS", 256)),
+                disk_dir=os.environ.get("CIP_PDF_CACHE_DIR") or None,
+                disk_max_bytes=int(float(os.environ.get("CIP_PDF_CACHE_DISK_MB", 256)) * 1024 * 1024),
+            )
+        return _default
+
+
+def results_pdf(creative_perc, bigfive_perc):
+    """Results PDF bytes for these percentages, from the cache when possible."""
+    return default_cache().get_or_render(
+        creative_perc, bigfive_perc, render=lambda c, b: _render(render_results_pdf, c, b))
+
+
+_academic = None
+
+
+def academic_pdf():
+    """Academic article PDF bytes; the same document for everyone, so rendered once per process."""
+    global _academic
+    if _academic is None:
+        _academic = _render(render_academic_pdf)
+    return _academic
@@ -0,0 +1,738 @@
+# --------------------------
+# Creative Identity Profile: shared content, scoring and PDF helpers
+# --------------------------
+# Imported by the Streamlit app (app.py) and the local HTTP API (api.py),
+# so nothing in here may touch Streamlit.
+import contextlib
+import io
+import os
+import re
+import threading
+import matplotlib
+matplotlib.use("Agg")  # headless rendering, also safe in worker processes
+import matplotlib.pyplot as plt
+import numpy as np
+try:
+    import fcntl
+except ImportError:  # Windows: file_lock only serializes threads
+    fcntl = None
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, Table, TableStyle, PageBreak
+from reportlab.lib.styles import ParagraphStyle
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib import colors
+from reportlab import rl_config
+from PIL import Image as PILImage  # Pillow ships with matplotlib
+
+# --------------------------
+# Block 2: Traits, Descriptions, Archetypes, Palette
+# --------------------------
+
+# --------------------------
+# Colours
+# --------------------------
+palette = {
+    "Originality": "#E56B6F",
+    "Curiosity": "#6D9DC5",
+    "Risk-Taking": "#F4A259",
+    "Imagination": "#A267AC",
+    "Discipline": "#4DA1A9",
+    "Collaboration": "#C5283D",
+    "Openness": "#05668D",
+    "Conscientiousness": "#88AB75",
+    "Extraversion": "#E2C044",
+    "Agreeableness": "#5E60CE",
+    "Neuroticism": "#C44536"
+}
+
+# --------------------------
+# Creative Traits
+# --------------------------
+creative_traits = {
+    "Originality": [
+        "I often find myself suggesting unusual or unexpected solutions.",
+        "I often think of alternative solutions others might not consider.",
+        "I value uniqueness in my work and thinking."
+    ],
+    "Curiosity": [
+        "I ask questions even when I’m not sure there’s an easy answer.",
+        "I seek out opportunities to learn new things.",
+        "I am curious about how things work."
+    ],
+    "Risk-Taking": [
+        "I am comfortable with uncertainty when exploring ideas.",
+        "I sometimes avoid new ideas because they might not work.",  # reverse-coded
+        "I take creative risks in my projects."
+    ],
+    "Imagination": [
+        "I often picture possibilities in my mind before I try them out.",
+        "I enjoy daydreaming and thinking about new scenarios.",
+        "I use mental imagery when solving problems."
+    ],
+    "Discipline": [
+        "I can stay focused on creative projects until completion.",
+        "I put structured effort into developing my ideas.",
+        "I find it difficult to stay focused on creative projects for a long time."  # reverse-coded
+    ],
+    "Collaboration": [
+        "When working with others, I build on their ideas as much as I share my own.",
+        "I enjoy exchanging ideas with others.",
+        "I often co-create with peers or colleagues."
+    ]
+}
+
+# --------------------------
+# Big Five Traits
+# --------------------------
+big_five_traits = {
+    "Openness": [
+        "I enjoy exploring new ideas and perspectives.",
+        "I enjoy exploring new art, music, or ideas, even if they’re unfamiliar.",
+        "I prefer sticking to familiar routines over trying new experiences."  # reverse-coded
+    ],
+    "Conscientiousness": [
+        "I pay attention to details when working.",
+        "I make detailed plans before starting a task.",
+        "I often leave tasks unfinished."  # reverse-coded
+    ],
+    "Extraversion": [
+        "I feel energized when interacting with people.",
+        "I enjoy group activities and conversations.",
+        "I usually prefer being alone rather than in social situations."  # reverse-coded
+    ],
+    "Agreeableness": [
+        "I am considerate of others’ needs and feelings.",
+        "I try to see things from other people’s perspectives during disagreements.",
+        "I sometimes put my own needs before others’."  # reverse-coded
+    ],
+    "Neuroticism": [
+        "I often feel stressed or anxious in daily life.",
+        "I can become easily worried about problems.",
+        "I remain calm even when under pressure."  # reverse-coded
+    ]
+}
+
+# --------------------------
+# Item order & answer scale
+# --------------------------
+# Canonical (unshuffled) order of all 33 items; compact encodings index into this.
+ITEMS = [(trait, q) for trait, qs in {**creative_traits, **big_five_traits}.items() for q in qs]
+ANSWER_LABELS = ["1 Strongly Disagree", "2 Disagree", "3 Neutral", "4 Agree", "5 Strongly Agree"]
+
+# Where checkpoints and other local data are written
+DATA_DIR = os.environ.get("CIP_DATA_DIR", "data")
+_file_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Serialize read-modify-write of a data file across threads (and processes where fcntl exists)."""
+    with _file_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path + ".lock", "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+# --------------------------
+# Reverse-coded mapping
+# --------------------------
+reverse_items = {
+    "Originality": [],
+    "Curiosity": [],
+    "Risk-Taking": [1],       # 2nd question reverse-coded
+    "Imagination": [],
+    "Discipline": [2],        # 3rd question reverse-coded
+    "Collaboration": [],
+    "Openness": [2],           # 3rd question reverse-coded
+    "Conscientiousness": [2],  # 3rd question reverse-coded
+    "Extraversion": [2],       # 3rd question reverse-coded
+    "Agreeableness": [2],      # 3rd question reverse-coded
+    "Neuroticism": [2]         # 3rd question reverse-coded
+}
+
+# --------------------------
+# Trait Descriptions
+# --------------------------
+trait_descriptions = {
+    "Originality": {
+        "high": "You thrive on breaking patterns and offering unique perspectives. Others often see you as a source of fresh, unconventional ideas.",
+        "medium": "You sometimes show originality but balance it with conventional approaches, depending on the situation.",
+        "low": "You prefer tried-and-tested methods over generating novel ideas, valuing familiarity over experimentation."
+    },
+    "Curiosity": {
+        "high": "You are constantly seeking new knowledge and experiences. You love questioning and exploring beyond the obvious.",
+        "medium": "You are curious when prompted but don’t always explore further without external motivation.",
+        "low": "You are less driven to question or seek out new experiences, preferring stability and routine."
+    },
+    "Risk-Taking": {
+        "high": "You embrace uncertainty and are willing to take creative risks, seeing setbacks as part of the journey.",
+        "medium": "You sometimes take risks but often prefer security, weighing potential downsides before acting.",
+        "low": "You prefer safe, predictable routes and avoid uncertainty whenever possible."
+    },
+    "Imagination": {
+        "high": "You easily envision new possibilities and future scenarios. Your ability to think beyond the present helps you innovate.",
+        "medium": "You imagine ideas sometimes but often remain practical and grounded in the here-and-now.",
+        "low": "You focus more on concrete realities than imaginative possibilities, preferring clarity over abstraction."
+    },
+    "Discipline": {
+        "high": "You bring persistence and structure to creative projects, often ensuring ideas reach completion.",
+        "medium": "You stay disciplined when motivated but can lose focus if enthusiasm drops.",
+        "low": "You often find it hard to sustain focus and follow-through, which can stall projects."
+    },
+    "Collaboration": {
+        "high": "You thrive in teamwork and enjoy co-creating with others, seeing group input as energising.",
+        "medium": "You collaborate when needed but also value independence and personal space.",
+        "low": "You prefer working alone and rely less on group dynamics for creativity."
+    },
+    "Openness": {
+        "high": "You are highly receptive to new experiences and perspectives, thriving in environments that encourage growth.",
+        "medium": "You are somewhat open to new experiences but prefer familiar territory for security.",
+        "low": "You resist change and prefer predictable, familiar approaches over new perspectives."
+    },
+    "Conscientiousness": {
+        "high": "You are dependable, organized, and detail-oriented, which supports long-term goals and achievements.",
+        "medium": "You show conscientiousness when motivated but don’t always stay consistent.",
+        "low": "You struggle with structure and consistency, often preferring spontaneity."
+    },
+    "Extraversion": {
+        "high": "You are highly energized by social interaction and seek out group experiences.",
+        "medium": "You enjoy socializing but also value time alone to recharge.",
+        "low": "You are more reserved and often prefer solitary or small-group settings."
+    },
+    "Agreeableness": {
+        "high": "You are cooperative, empathetic, and considerate, often putting group harmony above personal preference.",
+        "medium": "You are agreeable in many cases but still assert your own needs when necessary.",
+        "low": "You are less concerned with harmony and prioritize your own goals or principles."
+    },
+    "Neuroticism": {
+        "high": "You often feel strong emotions such as stress or worry, which can shape how you react under pressure.",
+        "medium": "You sometimes feel anxious or stressed but can usually manage your emotions.",
+        "low": "You are emotionally stable, resilient, and less prone to anxiety or negative moods."
+    }
+}
+
+# --------------------------
+# Archetypes
+# --------------------------
+archetypes = {
+    "Originality": ("The Innovator", "Divergent Thinker", "Practice brainstorming multiple solutions."),
+    "Curiosity": ("The Explorer", "Openness-driven Creative", "Adopt a beginner’s mindset, asking simple questions."),
+    "Risk-Taking": ("The Adventurer", "Tolerance for Uncertainty", "Start with small, low-stakes risks to build confidence."),
+    "Imagination": ("The Dreamer", "Imaginative Creator", "Engage in exercises like mind-mapping or ‘what if’ scenarios."),
+    "Discipline": ("The Builder", "Conscientious Creator", "Break goals into smaller steps and set clear deadlines."),
+    "Collaboration": ("The Connector", "Socially-Driven Creative", "Share even half-formed ideas to invite feedback and growth.")
+}
+
+# --------------------------
+# Block 3: Helper Functions
+# --------------------------
+
+ARTICLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "academic_article.txt")
+
+# --------------------------
+# Size-optimized PDF output
+# --------------------------
+# Two independent parts:
+#  - create_results_pdf(compact_charts=True) renders the radar charts at
+#    OPTIMIZED_CHART_DPI and re-encodes them as palette PNGs, which deflate
+#    far better inside the PDF (fit_results_pdf lowers them further);
+#  - use_raw_streams() drops ReportLab's ASCII85 wrapper (25% on top of Flate)
+#    for both builders. rl_config.useA85 is a process-wide setting read all
+#    through doc.build, so it can't be switched per document without racing
+#    other threads' builds: it is only ever switched in pdf_cache's render
+#    worker processes, never in the app or API processes.
+#
+# Both builders only use base-14 fonts (Helvetica), so no font is embedded,
+# and ReportLab already stores identical images once per document.
+OPTIMIZED_CHART_DPI = 150
+OPTIMIZED_CHART_COLORS = 64
+# Progressively smaller (dpi, palette colours) tried by fit_results_pdf
+SIZE_BUDGET_STEPS = [(150, 64), (110, 64), (110, 32), (80, 32), (60, 16)]
+
+
+def use_raw_streams():
+    """Write PDF streams as plain Flate (no ASCII85) for every later build in this process."""
+    rl_config.useA85 = 0
+
+
+def compact_png(buf, colors=OPTIMIZED_CHART_COLORS):
+    """Re-encode a chart PNG as an optimized palette PNG with at most `colors` colours."""
+    image = PILImage.open(buf).convert("RGB").quantize(colors)
+    out = io.BytesIO()
+    image.save(out, format="PNG", optimize=True)
+    out.seek(0)
+    return out
+
+
+def pdf_size_report(pdf):
+    """
+    Bytes per section of a finished PDF: images, fonts, page content streams,
+    document structure (pages, catalog, info) and the xref table / trailer.
+    """
+    report = {"images": 0, "fonts": 0, "page_content": 0, "structure": 0, "xref_trailer": 0}
+    counted = 0
+    for match in re.finditer(rb"\d+ \d+ obj\b(.*?)endobj", pdf, re.S):
+        body = match.group(1)
+        size = match.end() - match.start()
+        counted += size
+        head = body[:400]
+        if b"/Subtype /Image" in head:
+            report["images"] += size
+        elif b"/Type /Font" in head or b"/FontDescriptor" in head or b"/FontFile" in head:
+            report["fonts"] += size
+        elif b"stream" in body and b"/Type" not in head:
+            report["page_content"] += size
+        else:
+            report["structure"] += size
+    report["xref_trailer"] = len(pdf) - counted
+    report["total"] = len(pdf)
+    return report
+
+
+# --------------------------
+# Academic PDF function
+# --------------------------
+def create_academic_pdf():
+    """Build the academic article PDF (text only; see use_raw_streams for smaller output)."""
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=50,
+        rightMargin=50,
+        topMargin=50,
+        bottomMargin=50,
+        pageCompression=1
+    )
+
+    styles = {
+        "title": ParagraphStyle(
+            "title",
+            fontSize=14,
+            leading=18,
+            alignment=TA_CENTER,
+            spaceAfter=10,
+            underline=True,
+            fontName="Helvetica-Bold"
+        ),
+        "heading": ParagraphStyle(
+            "heading",
+            fontSize=12,
+            leading=16,
+            alignment=TA_LEFT,
+            spaceBefore=10,
+            spaceAfter=6,
+            underline=True,
+            fontName="Helvetica-Bold"
+        ),
+        "body": ParagraphStyle(
+            "body",
+            fontSize=10,
+            leading=14,
+            alignment=TA_LEFT,
+            spaceAfter=6,
+            fontName="Helvetica"
+        ),
+    }
+
+    story = []
+    with open(ARTICLE_PATH, "r") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                story.append(Spacer(1, 12))
+            elif line.startswith("# "):
+                story.append(Paragraph(line[2:], styles["title"]))
+            elif line.startswith("## "):
+                story.append(Paragraph(line[3:], styles["heading"]))
+            else:
+                story.append(Paragraph(line, styles["body"]))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+# --------------------------
+# PDF-safe radar chart function
+# --------------------------
+def radar_chart_pdf(scores, title, size_inch=2.6, dpi=200):
+    """
+    Return a BytesIO PNG of a square radar chart.
+    size_inch: figure size in inches (width == height)
+    """
+    import io
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    labels = list(scores.keys())
+    values = list(scores.values())
+    # close the loop
+    values = values + values[:1]
+    num_vars = len(labels)
+    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
+    angles = angles + angles[:1]
+
+    # Create perfectly square figure
+    fig = plt.figure(figsize=(size_inch, size_inch))
+    try:
+        ax = fig.add_subplot(111, polar=True)
+
+        # Try to force equal aspect; polar axes sometimes ignore box_aspect,
+        # but the main fix is saving without bbox_inches='tight' to preserve square pixels.
+        try:
+            ax.set_box_aspect(1)
+        except Exception:
+            try:
+                ax.set_aspect('equal')
+            except Exception:
+                pass
+
+        # Background polygon (faint)
+        ax.plot(angles, values, color='grey', linewidth=1, alpha=0.25)
+        ax.fill(angles, values, color='grey', alpha=0.05)
+
+        # Draw colored segments & points per trait
+        for i, label in enumerate(labels):
+            start_ang = angles[i]
+            end_ang = angles[i + 1]
+            start_val = values[i]
+            end_val = values[i + 1]
+            ax.plot([start_ang, end_ang], [start_val, end_val], color=palette.get(label, "#888888"), linewidth=2)
+            ax.plot(start_ang, start_val, 'o', color=palette.get(label, "#888888"), markersize=6)
+
+        # Axes settings
+        ax.set_xticks(angles[:-1])
+        ax.set_xticklabels(labels, fontsize=8)
+        ax.set_yticklabels([])
+        ax.set_ylim(0, 100)
+        ax.set_title(title, size=12, weight="bold", pad=12)
+
+        # Save WITHOUT bbox_inches='tight' (keeps the PNG square)
+        buf = io.BytesIO()
+        fig.savefig(buf, format="PNG", dpi=dpi)
+        buf.seek(0)
+    finally:
+        plt.close(fig)
+    return buf
+
+
+# --------------------------
+# Results PDF
+# --------------------------
+def create_results_pdf(creative_perc, bigfive_perc, trait_descriptions, archetypes,
+                       compact_charts=False, chart_dpi=None, chart_colors=OPTIMIZED_CHART_COLORS):
+    """
+    Build a results PDF buffer with:
+     - two square radar charts side-by-side,
+     - three coloured archetype cards (Primary / Sub / Growth),
+     - Creative and Big Five trait lists in two columns.
+    compact_charts=True embeds smaller palette-PNG charts (see "Size-optimized
+    PDF output" above); stream encoding follows the process.
+    """
+    from reportlab.lib.units import inch
+    from reportlab.lib import colors as rl_colors
+    from reportlab.platypus import Paragraph, Spacer, Image, Table, TableStyle
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.enums import TA_CENTER, TA_LEFT
+    import io
+
+    # Page & margins
+    left_margin = 40
+    right_margin = 40
+    top_margin = 40
+    bottom_margin = 40
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=left_margin,
+        rightMargin=right_margin,
+        topMargin=top_margin,
+        bottomMargin=bottom_margin,
+        pageCompression=1
+    )
+
+    # Styles
+    styles = {
+        "title": ParagraphStyle("title", fontSize=18, leading=22, alignment=TA_CENTER, spaceAfter=12, fontName="Helvetica-Bold"),
+        "subtitle": ParagraphStyle("subtitle", fontSize=14, leading=18, alignment=TA_LEFT, spaceAfter=8, fontName="Helvetica-Bold"),
+        "body": ParagraphStyle("body", fontSize=11, leading=14, alignment=TA_LEFT, spaceAfter=6, fontName="Helvetica"),
+        "card_title": ParagraphStyle("card_title", fontSize=12, leading=14, alignment=TA_LEFT, textColor=rl_colors.white, fontName="Helvetica-Bold"),
+    }
+
+    story = []
+    story.append(Paragraph("Your Creative Identity Profile", styles["title"]))
+    story.append(Spacer(1, 8))
+
+    # --- Radar charts (compute available width and choose chart size that fits) ---
+    page_width_pts, _ = A4
+    content_width_pts = page_width_pts - (left_margin + right_margin)
+    # available width per chart if side-by-side (leave small padding)
+    max_chart_width_inch = (content_width_pts / 72.0) / 2.0 - 0.25
+    # choose chart size (inches) but cap to a reasonable default (2.8 -> fits most A4 layouts)
+    chart_inch = min(2.8, max_chart_width_inch if max_chart_width_inch > 1.8 else 2.2)
+
+    if chart_dpi is None:
+        chart_dpi = OPTIMIZED_CHART_DPI if compact_charts else 200
+    chart_buf_creative = radar_chart_pdf(creative_perc, "Creative Traits", size_inch=chart_inch, dpi=chart_dpi)
+    chart_buf_big5 = radar_chart_pdf(bigfive_perc, "Big Five Traits", size_inch=chart_inch, dpi=chart_dpi)
+    if compact_charts:
+        chart_buf_creative = compact_png(chart_buf_creative, chart_colors)
+        chart_buf_big5 = compact_png(chart_buf_big5, chart_colors)
+
+    img_creative = Image(chart_buf_creative, width=chart_inch * inch, height=chart_inch * inch)
+    img_big5 = Image(chart_buf_big5, width=chart_inch * inch, height=chart_inch * inch)
+
+    chart_col_width = chart_inch * inch
+    # Center the charts: put them in a table and center the table
+    chart_table = Table([[img_creative, img_big5]], colWidths=[chart_col_width, chart_col_width])
+    chart_table.setStyle(TableStyle([
+        ("ALIGN", (0, 0), (-1, -1), "CENTER"),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LEFTPADDING", (0,0), (-1,-1), 6),
+        ("RIGHTPADDING", (0,0), (-1,-1), 6),
+    ]))
+    story.append(chart_table)
+    story.append(Spacer(1, 12))
+
+    # --- Archetype cards (Primary, Sub, Growth) ---
+    # determine primary, sub, growth from creative_perc
+    sorted_traits = sorted(creative_perc.items(), key=lambda x: x[1], reverse=True)
+    top_trait = sorted_traits[0][0]
+    sub_trait = sorted_traits[1][0] if len(sorted_traits) > 1 else None
+    lowest_trait = sorted_traits[-1][0]
+
+    def add_archetype_card(trait_key, title_text, desc_text, tip_text):
+        bg_hex = palette.get(trait_key, "#7b2ff7")
+        bg_color = rl_colors.HexColor(bg_hex)
+        # Title block with background color
+        title_para = Paragraph(title_text, styles["card_title"])
+        title_table = Table([[title_para]], colWidths=[content_width_pts - 0])  # full width
+        title_table.setStyle(TableStyle([
+            ("BACKGROUND", (0,0), (-1,-1), bg_color),
+            ("LEFTPADDING", (0,0), (-1,-1), 8),
+            ("RIGHTPADDING", (0,0), (-1,-1), 8),
+            ("TOPPADDING", (0,0), (-1,-1), 6),
+            ("BOTTOMPADDING", (0,0), (-1,-1), 6),
+        ]))
+        story.append(title_table)
+        story.append(Spacer(1, 4))
+        # description and tip (normal body style)
+        story.append(Paragraph(desc_text, styles["body"]))
+        story.append(Paragraph(f"<b>Growth Tip:</b> {tip_text}", styles["body"]))
+        story.append(Spacer(1, 8))
+
+    # Primary
+    top_desc = trait_descriptions[top_trait]["high"] if creative_perc[top_trait] >= 67 else \
+               trait_descriptions[top_trait]["medium"] if creative_perc[top_trait] >= 34 else \
+               trait_descriptions[top_trait]["low"]
+    add_archetype_card(top_trait, f"Primary Archetype: {archetypes[top_trait][0]} ({archetypes[top_trait][1]})", top_desc, archetypes[top_trait][2])
+
+    # Sub
+    if sub_trait:
+        sub_desc = trait_descriptions[sub_trait]["high"] if creative_perc[sub_trait] >= 67 else \
+                   trait_descriptions[sub_trait]["medium"] if creative_perc[sub_trait] >= 34 else \
+                   trait_descriptions[sub_trait]["low"]
+        add_archetype_card(sub_trait, f"Sub-Archetype: {archetypes[sub_trait][0]} ({archetypes[sub_trait][1]})", sub_desc, archetypes[sub_trait][2])
+
+    # Growth
+    low_desc = trait_descriptions[lowest_trait]["low"]
+    add_archetype_card(lowest_trait, f"Growth Area: {lowest_trait}", low_desc, archetypes[lowest_trait][2])
+
+    story.append(Spacer(1, 8))
+
+    # --- Insert Page Break here to start a new page for traits ---
+    story.append(PageBreak())
+
+    # --- Traits: two-column lists for Creative and Big Five on the new page ---
+    def trait_table(traits_dict, heading_text):
+        story.append(Paragraph(heading_text, styles["subtitle"]))
+        traits = list(traits_dict.items())
+        mid = (len(traits) + 1) // 2
+        left = traits[:mid]
+        right = traits[mid:]
+
+        rows = []
+        col_w = (content_width_pts / 2.0)
+
+        for i in range(max(len(left), len(right))):
+            left_cell = ""
+            if i < len(left):
+                t, p = left[i]
+                desc = trait_descriptions[t]["high"] if p >= 67 else \
+                       trait_descriptions[t]["medium"] if p >= 34 else \
+                       trait_descriptions[t]["low"]
+                left_cell = f"<b>{t}: {p}%</b><br/>{desc}"
+            right_cell = ""
+            if i < len(right):
+                t, p = right[i]
+                desc = trait_descriptions[t]["high"] if p >= 67 else \
+                       trait_descriptions[t]["medium"] if p >= 34 else \
+                       trait_descriptions[t]["low"]
+                right_cell = f"<b>{t}: {p}%</b><br/>{desc}"
+            rows.append([Paragraph(left_cell, styles["body"]), Paragraph(right_cell, styles["body"])])
+
+        tbl = Table(rows, colWidths=[col_w, col_w], hAlign='LEFT')
+        tbl.setStyle(TableStyle([
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("LEFTPADDING", (0,0), (-1,-1), 6),
+            ("RIGHTPADDING", (0,0), (-1,-1), 6),
+            ("TOPPADDING", (0,0), (-1,-1), 2),
+            ("BOTTOMPADDING", (0,0), (-1,-1), 6),
+        ]))
+        story.append(tbl)
+        story.append(Spacer(1, 10))
+
+    # Add the two trait tables to the **second page**
+    trait_table(creative_perc, "Creative Traits")
+    trait_table(bigfive_perc, "Big Five Traits")
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer
+
+
+def fit_results_pdf(creative_perc, bigfive_perc, trait_descriptions, archetypes, max_bytes=None):
+    """
+    Results PDF with compact charts that fits max_bytes if possible: walks
+    SIZE_BUDGET_STEPS until the document fits (the last step is returned even
+    if it does not). Returns (pdf bytes, report) where report is
+    pdf_size_report() plus the chosen settings and whether it is within budget.
+    """
+    for dpi, chart_colors in SIZE_BUDGET_STEPS:
+        pdf = create_results_pdf(creative_perc, bigfive_perc, trait_descriptions, archetypes,
+                                 compact_charts=True, chart_dpi=dpi, chart_colors=chart_colors).getvalue()
+        if max_bytes is None or len(pdf) <= max_bytes:
+            break
+    report = pdf_size_report(pdf)
+    report.update({"chart_dpi": dpi, "chart_colors": chart_colors, "max_bytes": max_bytes,
+                   "within_budget": max_bytes is None or len(pdf) <= max_bytes})
+    return pdf, report
+
+# --------------------------
+# Score calculation
+# --------------------------
+def calculate_scores(traits, responses):
+    scores = {}
+    for trait, qs in traits.items():
+        trait_values = []
+        for i, q in enumerate(qs):
+            key = f"{trait}_{q}"
+            if key not in responses:
+                continue
+            val = int(responses[key][0])
+            if trait in reverse_items and i in reverse_items[trait]:
+                val = 6 - val
+            trait_values.append(val)
+        if trait_values:
+            scores[trait] = np.mean(trait_values)
+    return scores
+
+# --------------------------
+# Percentages & interpretation
+# --------------------------
+def to_percentages(scores):
+    """Map mean 1-5 trait scores onto the 0-100 scale shown to participants."""
+    return {t: round((s - 1) / 4 * 100) for t, s in scores.items()}
+
+
+def trait_level(perc):
+    """Band a trait percentage into the description key used by trait_descriptions."""
+    if perc >= 67:
+        return "high"
+    elif perc >= 34:
+        return "medium"
+    return "low"
+
+
+def interpret_profile(creative_perc, bigfive_perc):
+    """
+    Return the same interpretation the results page shows:
+     - per-trait level and description for both trait sets,
+     - primary / sub archetype and growth area picked from creative_perc.
+    """
+    traits = {}
+    for t, p in {**creative_perc, **bigfive_perc}.items():
+        level = trait_level(p)
+        traits[t] = {"percent": p, "level": level, "description": trait_descriptions[t][level]}
+
+    sorted_traits = sorted(creative_perc.items(), key=lambda x: x[1], reverse=True)
+    top_trait, sub_trait, lowest_trait = sorted_traits[0][0], sorted_traits[1][0], sorted_traits[-1][0]
+
+    def card(trait, description):
+        name, style, tip = archetypes[trait]
+        return {"trait": trait, "archetype": name, "style": style, "description": description, "growth_tip": tip}
+
+    return {
+        "traits": traits,
+        "primary": card(top_trait, traits[top_trait]["description"]),
+        "sub": card(sub_trait, traits[sub_trait]["description"]),
+        "growth": card(lowest_trait, trait_descriptions[lowest_trait]["low"]),
+    }
+
+
+def score_responses(responses):
+    """Score one respondent's answers (keyed like the quiz widgets) into percentages."""
+    creative_perc = to_percentages(calculate_scores(creative_traits, responses))
+    bigfive_perc = to_percentages(calculate_scores(big_five_traits, responses))
+    return creative_perc, bigfive_perc
+
+# --------------------------
+# Answer matrices (one int8 row of 33 answers per respondent, ITEMS order, 0 = unanswered)
+# --------------------------
+TRAITS = list({**creative_traits, **big_five_traits})
+ITEM_TRAIT = np.array([TRAITS.index(t) for t, _ in ITEMS])
+REVERSE_MASK = np.array([
+    i in reverse_items.get(t, []) for t, qs in {**creative_traits, **big_five_traits}.items() for i in range(len(qs))
+])
+# ITEMS is grouped by trait, so per-trait sums are np.add.reduceat over these column offsets
+_TRAIT_STARTS = np.flatnonzero(np.r_[True, ITEM_TRAIT[1:] != ITEM_TRAIT[:-1]])
+_ITEMS_PER_TRAIT = np.bincount(ITEM_TRAIT)
+_REVERSE_COLUMNS = np.flatnonzero(REVERSE_MASK)
+# Flattened (11, max sum + 1) lookup: keyed item sum -> percentage, computed exactly
+# as to_percentages(calculate_scores(...)) does, so the vectorized path can't drift
+_LUT_WIDTH = 5 * int(_ITEMS_PER_TRAIT.max()) + 1
+_PERCENT_LUT = np.array([
+    [round((s / k - 1) / 4 * 100) if k <= s <= 5 * k else 0 for s in range(_LUT_WIDTH)]
+    for k in _ITEMS_PER_TRAIT
+], dtype=np.int8).ravel()
+_LUT_OFFSETS = np.arange(len(TRAITS)) * _LUT_WIDTH
+
+
+def answers_row(responses):
+    """Pack widget-keyed responses into one int8 row in ITEMS order."""
+    row = np.zeros(len(ITEMS), dtype=np.int8)
+    for i, (trait, q) in enumerate(ITEMS):
+        label = responses.get(f"{trait}_{q}")
+        if label:
+            row[i] = int(label[0])
+    return row
+
+
+def keyed_answers(answers):
+    """Apply reverse coding (6 - x) to an (N, 33) answer matrix; unanswered zeros stay zero."""
+    answers = np.asarray(answers, dtype=np.int8)
+    return np.where(REVERSE_MASK & (answers > 0), 6 - answers, answers).astype(np.int8)
+
+
+def score_matrix(answers):
+    """
+    Vectorized calculate_scores + to_percentages for complete rows: returns an
+    (N, 11) int8 matrix of trait percentages in TRAITS order.
+    """
+    keyed = np.array(answers, dtype=np.int8, ndmin=2)
+    keyed[:, _REVERSE_COLUMNS] = 6 - keyed[:, _REVERSE_COLUMNS]
+    k = int(_ITEMS_PER_TRAIT[0])
+    if (_ITEMS_PER_TRAIT == k).all():
+        # equal-sized traits: strided column adds are much faster than reduceat
+        sums = sum(keyed[:, j::k] for j in range(k))
+    else:
+        sums = np.add.reduceat(keyed, _TRAIT_STARTS, axis=1)
+    return np.take(_PERCENT_LUT, sums + _LUT_OFFSETS)
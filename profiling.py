@@ -0,0 +1,117 @@
+# --------------------------
+# Opt-in per-rerun profiler
+# --------------------------
+# Samples the stack of the thread running one script rerun of app.py and
+# writes the result to PROFILE_DIR as
+#   *.speedscope.json  (open at https://www.speedscope.app)
+#   *.folded           (collapsed stacks for flamegraph.pl / inferno)
+#
+# Enabled for every rerun with CIP_PROFILE=1, or for a single rerun with
+# ?profile=<CIP_ADMIN_TOKEN>. When neither is set, start() is one env check
+# and one dict lookup: no thread, no tracing hooks.
+#
+# The sampler stops by itself once the app.py module frame leaves the stack,
+# so reruns that end early through st.rerun() or an exception are captured too.
+import json
+import os
+import sys
+import threading
+import time
+
+import telemetry
+from profile_core import DATA_DIR
+
+PROFILE_ALL = os.environ.get("CIP_PROFILE") == "1"
+PROFILE_DIR = os.environ.get("CIP_PROFILE_DIR", os.path.join(DATA_DIR, "profiles"))
+INTERVAL = float(os.environ.get("CIP_PROFILE_INTERVAL", 0.001))  # seconds between samples
+MAX_SECONDS = 120
+
+
+class RerunSampler(threading.Thread):
+    def __init__(self, target_thread, script_path, label):
+        super().__init__(name="cip-profiler", daemon=True)
+        self.target_id = target_thread.ident
+        self.script_path = os.path.abspath(script_path)
+        self.label = label
+        self.frames = []        # speedscope shared frame table
+        self._frame_index = {}
+        self.samples = []       # lists of frame indexes, root first
+        self.weights = []       # seconds attributed to each sample
+
+    def _stack(self):
+        frame = sys._current_frames().get(self.target_id)
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            if code.co_name == "<module>" and os.path.abspath(code.co_filename) == self.script_path:
+                stack.reverse()
+                return stack
+            frame = frame.f_back
+        return None  # script module frame is gone: the rerun has finished
+
+    def _index(self, key):
+        idx = self._frame_index.get(key)
+        if idx is None:
+            name, path, line = key
+            idx = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": name, "file": path, "line": line})
+        return idx
+
+    def run(self):
+        started = last = time.perf_counter()
+        seen = False
+        while time.perf_counter() - started < MAX_SECONDS:
+            stack = self._stack()
+            now = time.perf_counter()
+            if stack is None:
+                if seen:
+                    break
+            else:
+                seen = True
+                self.samples.append([self._index(key) for key in stack])
+                self.weights.append(now - last)
+            last = now
+            time.sleep(INTERVAL)
+        if self.samples:
+            self.write(time.perf_counter() - started)
+
+    def write(self, duration):
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        stem = os.path.join(PROFILE_DIR, f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{self.label}-{self.ident}")
+
+        speedscope = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": f"app.py rerun ({self.label})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": duration,
+                "samples": self.samples,
+                "weights": self.weights,
+            }],
+            "name": f"Creative Identity Profile rerun ({self.label})",
+            "exporter": "profiling.py",
+        }
+        with open(stem + ".speedscope.json", "w") as f:
+            json.dump(speedscope, f)
+
+        folded = {}
+        for sample, weight in zip(self.samples, self.weights):
+            key = ";".join(f"{self.frames[i]['name']} ({os.path.basename(self.frames[i]['file'])}:{self.frames[i]['line']})"
+                           for i in sample)
+            folded[key] = folded.get(key, 0) + weight
+        with open(stem + ".folded", "w") as f:
+            for key, seconds in folded.items():
+                f.write(f"{key} {max(1, round(seconds * 1e6))}\n")  # microseconds
+
+
+def start(script_path, query_params, label="rerun"):
+    """Profile the current rerun if profiling is enabled; returns the sampler or None."""
+    if not PROFILE_ALL and not telemetry.is_admin(query_params.get("profile")):
+        return None
+    sampler = RerunSampler(threading.current_thread(), script_path, label)
+    sampler.start()
+    return sampler
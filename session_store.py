@@ -0,0 +1,356 @@
+# --------------------------
+# Session-state backends
+# --------------------------
+# Where checkpoint.py keeps encoded quiz progress, so several Streamlit
+# processes (behind a load balancer, without sticky sessions) and restarts
+# all see the same progress for a ?resume= token.
+#
+# CIP_SESSION_BACKEND selects the backend:
+#   file                   one small file per token in DATA_DIR/checkpoints (default)
+#   sqlite[:path]          a single SQLite database (default DATA_DIR/sessions.sqlite3)
+#   redis://host:port/db   any server speaking the Redis protocol (RESP)
+#
+# Writes go through WriteBehind: puts are coalesced per token in memory and
+# flushed in one batch (one transaction / one pipelined round trip) every
+# CIP_SESSION_FLUSH seconds (default 0.25), or immediately with flush=True.
+#
+# Checkpoints are kept for CIP_CHECKPOINT_TTL seconds after their last write
+# (default 30 days): Redis expires them itself, the file and SQLite backends
+# are pruned by checkpoint.maybe_sweep().
+import atexit
+import logging
+import os
+import re
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+from profile_core import DATA_DIR
+
+log = logging.getLogger(__name__)
+CHECKPOINT_TTL = float(os.environ.get("CIP_CHECKPOINT_TTL", 30 * 24 * 3600))
+
+_TOKEN_RE = re.compile(r"^[A-Za-z0-9_-]{8,64}$")
+
+
+def valid_token(token):
+    return bool(token) and bool(_TOKEN_RE.match(token))
+
+
+class SessionBackend:
+    """Blob store keyed by resume token."""
+
+    def get(self, token):
+        raise NotImplementedError
+
+    def put_many(self, items):
+        """Store {token: bytes} in one batch."""
+        raise NotImplementedError
+
+    def delete(self, token):
+        raise NotImplementedError
+
+    def prune(self, older_than):
+        """Delete checkpoints last written before the unix time older_than; returns how many."""
+        return 0
+
+
+# --------------------------
+# Local file
+# --------------------------
+class FileBackend(SessionBackend):
+    def __init__(self, path=os.path.join(DATA_DIR, "checkpoints")):
+        self.path = path
+
+    def _file(self, token):
+        return os.path.join(self.path, token + ".bin")
+
+    def get(self, token):
+        try:
+            with open(self._file(token), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put_many(self, items):
+        os.makedirs(self.path, exist_ok=True)
+        for token, blob in items.items():
+            tmp = f"{self._file(token)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, self._file(token))
+
+    def delete(self, token):
+        try:
+            os.remove(self._file(token))
+        except FileNotFoundError:
+            pass
+
+    def prune(self, older_than):
+        removed = 0
+        try:
+            entries = list(os.scandir(self.path))
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            try:
+                if entry.name.endswith(".bin") and entry.stat().st_mtime < older_than:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:  # removed by another process
+                pass
+        return removed
+
+
+# --------------------------
+# SQLite
+# --------------------------
+class SQLiteBackend(SessionBackend):
+    def __init__(self, path=os.path.join(DATA_DIR, "sessions.sqlite3")):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connection() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS sessions "
+                       "(token TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+
+    def _connection(self):
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = sqlite3.connect(self.path, timeout=30)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def get(self, token):
+        row = self._connection().execute("SELECT data FROM sessions WHERE token = ?", (token,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def put_many(self, items):
+        now = time.time()
+        with self._connection() as db:
+            db.executemany(
+                "INSERT INTO sessions (token, data, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(token) DO UPDATE SET data = excluded.data, updated = excluded.updated",
+                [(token, blob, now) for token, blob in items.items()])
+
+    def delete(self, token):
+        with self._connection() as db:
+            db.execute("DELETE FROM sessions WHERE token = ?", (token,))
+
+    def prune(self, older_than):
+        with self._connection() as db:
+            return db.execute("DELETE FROM sessions WHERE updated < ?", (older_than,)).rowcount
+
+
+# --------------------------
+# Redis protocol
+# --------------------------
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend(SessionBackend):
+    """Minimal RESP2 client (GET / SET / DEL, pipelined) so no redis package is needed."""
+
+    def __init__(self, url="redis://127.0.0.1:6379/0", prefix="cip:session:", expire_seconds=CHECKPOINT_TTL):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.password = parsed.password
+        self.prefix = prefix
+        self.expire_seconds = expire_seconds
+        self._lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=10)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", str(self.db)))
+        try:
+            if setup:
+                self._send(setup)
+        except BaseException:
+            # never leave a connection that is unauthenticated or on the wrong db
+            self.close()
+            raise
+
+    @staticmethod
+    def _encode(args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if isinstance(arg, str):
+                arg = arg.encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    def _reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("connection closed by server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            return RedisError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            n = int(rest)
+            if n < 0:
+                return None
+            data = self._reader.read(n + 2)
+            return data[:-2]
+        if kind == b"*":
+            n = int(rest)
+            return None if n < 0 else [self._reply() for _ in range(n)]
+        raise RedisError(f"unexpected reply {line!r}")
+
+    def _send(self, commands):
+        """Send commands in one write and read all replies (pipelining)."""
+        self._sock.sendall(b"".join(self._encode(c) for c in commands))
+        replies = [self._reply() for _ in commands]
+        for r in replies:
+            if isinstance(r, RedisError):
+                raise r
+        return replies
+
+    def _execute(self, commands):
+        with self._lock:
+            for attempt in (0, 1):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._send(commands)
+                except (OSError, ConnectionError):
+                    self.close()
+                    if attempt:
+                        raise
+
+    def close(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = self._reader = None
+
+    def get(self, token):
+        return self._execute([("GET", self.prefix + token)])[0]
+
+    def put_many(self, items):
+        if items:
+            self._execute([("SET", self.prefix + token, blob, "EX", str(int(self.expire_seconds)))
+                           for token, blob in items.items()])
+
+    def delete(self, token):
+        self._execute([("DEL", self.prefix + token)])
+
+
+# --------------------------
+# Batched writes
+# --------------------------
+class WriteBehind:
+    """Coalesces puts per token and flushes them to the backend in batches."""
+
+    def __init__(self, backend, flush_interval=0.25):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="cip-session-writer", daemon=True)
+        self._thread.start()
+        atexit.register(self._flush_logged)
+
+    def get(self, token):
+        with self._lock:
+            blob = self._pending.get(token)
+        return blob if blob is not None else self.backend.get(token)
+
+    def put(self, token, blob, flush=False):
+        with self._lock:
+            self._pending[token] = blob
+        if flush:
+            try:
+                self.flush()
+            except Exception:
+                self._wake.set()  # still queued; let the background thread retry it
+                raise
+        else:
+            self._wake.set()
+
+    def delete(self, token):
+        with self._lock:
+            self._pending.pop(token, None)
+        self.backend.delete(token)
+
+    def prune(self, ttl=CHECKPOINT_TTL):
+        return self.backend.prune(time.time() - ttl)
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            try:
+                self.backend.put_many(batch)
+            except Exception:
+                # keep the writes for the next flush, unless newer ones replaced them
+                with self._lock:
+                    self._pending = {**batch, **self._pending}
+                raise
+
+    def _flush_logged(self):
+        try:
+            self.flush()
+            return True
+        except Exception:
+            log.exception("session store flush to %s failed", type(self.backend).__name__)
+            return False
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.flush_interval)
+            self._wake.clear()
+            if not self._flush_logged():
+                time.sleep(1)
+
+
+def backend_from_env(spec=None):
+    spec = spec if spec is not None else os.environ.get("CIP_SESSION_BACKEND", "file")
+    if spec.startswith(("redis://", "rediss://")):
+        if spec.startswith("rediss://"):
+            raise ValueError("TLS (rediss://) is not supported by the built-in Redis client")
+        return RedisBackend(spec)
+    if spec == "sqlite" or spec.startswith("sqlite:"):
+        path = spec.partition(":")[2]
+        return SQLiteBackend(path) if path else SQLiteBackend()
+    if spec == "file":
+        return FileBackend()
+    raise ValueError(f"unknown CIP_SESSION_BACKEND {spec!r}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide WriteBehind over the configured backend."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = WriteBehind(backend_from_env(), float(os.environ.get("CIP_SESSION_FLUSH", 0.25)))
+        return _store
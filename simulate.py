@@ -0,0 +1,179 @@
+# --------------------------
+# Monte-Carlo simulation of scores and archetypes
+# --------------------------
+# Generates synthetic respondents, scores them exactly like the app
+# (profile_core.score_matrix) and assigns archetypes with the results-page
+# rule -- creative traits sorted by percentage (stable, so ties keep
+# creative_traits order): first = primary, second = sub, last = growth area.
+# Everything is vectorized and runs in fixed-size chunks, so memory stays
+# bounded however many respondents are simulated.
+#
+# Answer models:
+#   categorical  every item drawn from --probs (P(1)..P(5)), or per trait from --probs-json
+#   latent       one N(0, 1) level per trait and respondent; answer =
+#                round(3 + loading * level (negated for reverse-coded items) + noise * N(0, 1)), clipped to 1-5
+#
+#   python simulate.py -n 5000000 --model latent --loading 1.0 --noise 0.8
+import argparse
+import json
+import time
+
+import numpy as np
+
+from profile_core import ITEMS, TRAITS, ITEM_TRAIT, REVERSE_MASK, creative_traits, archetypes, score_matrix
+
+CREATIVE = list(creative_traits)
+N_CREATIVE = len(CREATIVE)
+BANDS = ("low", "medium", "high")
+
+
+# --------------------------
+# Answer generators
+# --------------------------
+def categorical_answers(rng, n, item_probs):
+    """(n, 33) int8 answers; item_probs is a (33, 5) matrix of answer probabilities."""
+    cdf = np.cumsum(item_probs, axis=1)
+    u = rng.random((n, len(ITEMS)), dtype=np.float32)
+    answers = np.ones((n, len(ITEMS)), dtype=np.int8)
+    for k in range(4):
+        answers += u > cdf[:, k].astype(np.float32)
+    return answers
+
+
+def latent_answers(rng, n, loading=1.0, noise=0.8):
+    level = rng.standard_normal((n, len(TRAITS)), dtype=np.float32)
+    sign = np.where(REVERSE_MASK, -1.0, 1.0).astype(np.float32)
+    x = 3 + loading * level[:, ITEM_TRAIT] * sign + noise * rng.standard_normal((n, len(ITEMS)), dtype=np.float32)
+    return np.clip(np.rint(x), 1, 5).astype(np.int8)
+
+
+# --------------------------
+# Archetype rule
+# --------------------------
+def assign_archetypes(creative_perc):
+    """
+    Vectorized version of the results-page rule for an (n, 6) percentage
+    matrix in creative_traits order. Returns (primary, sub, growth) trait
+    indexes and boolean flags for whether a tie decided each pick.
+
+    Works column by column: with only six traits, a few whole-column
+    comparisons are much cheaper than row-wise argmax/argsort.
+    """
+    n = len(creative_perc)
+    cols = [np.ascontiguousarray(creative_perc[:, j]) for j in range(N_CREATIVE)]
+
+    top = np.zeros(n, dtype=np.int8)
+    top_val = cols[0].copy()
+    growth = np.zeros(n, dtype=np.int8)
+    low_val = cols[0].copy()
+    for j in range(1, N_CREATIVE):
+        higher = cols[j] > top_val    # strict: the first of equal highest stays, as in a stable sort
+        top[higher] = j
+        np.maximum(top_val, cols[j], out=top_val)
+        lower = cols[j] <= low_val    # non-strict: the last of equal lowest wins
+        growth[lower] = j
+        np.minimum(low_val, cols[j], out=low_val)
+
+    sub = np.zeros(n, dtype=np.int8)
+    sub_val = np.full(n, -1, dtype=np.int16)
+    for j in range(N_CREATIVE):
+        higher = (cols[j] > sub_val) & (top != j)
+        sub[higher] = j
+        sub_val[higher] = cols[j][higher]
+
+    top_count = sum((c == top_val).astype(np.int8) for c in cols)
+    low_count = sum((c == low_val).astype(np.int8) for c in cols)
+    sub_count = sum(((c == sub_val) & (top != j)).astype(np.int8) for j, c in enumerate(cols))
+    ties = {"primary": top_count > 1, "sub": sub_count > 1, "growth": low_count > 1}
+    return top, sub, growth, ties
+
+
+# --------------------------
+# Simulation
+# --------------------------
+def simulate(n, answers_fn, chunk=250_000, seed=None):
+    if n <= 0:
+        raise ValueError("need at least one respondent")
+    rng = np.random.default_rng(seed)
+    picks = {role: np.zeros(N_CREATIVE, dtype=np.int64) for role in ("primary", "sub", "growth")}
+    ties = {role: 0 for role in picks}
+    all_equal = 0
+    bands = np.zeros((len(TRAITS), 3), dtype=np.int64)
+    perc_hist = np.zeros((len(TRAITS), 101), dtype=np.int64)
+
+    started = time.perf_counter()
+    done = 0
+    while done < n:
+        k = min(chunk, n - done)
+        perc = score_matrix(answers_fn(rng, k))
+        creative = perc[:, :N_CREATIVE]
+
+        top, sub, growth, tie_flags = assign_archetypes(creative)
+        for role, idx in (("primary", top), ("sub", sub), ("growth", growth)):
+            picks[role] += np.bincount(idx, minlength=N_CREATIVE)
+            ties[role] += int(tie_flags[role].sum())
+        all_equal += int((creative.max(axis=1) == creative.min(axis=1)).sum())
+
+        # one bincount per statistic over (trait, value) pairs
+        band = (perc >= 34).astype(np.intp) + (perc >= 67)
+        bands += np.bincount((band + 3 * np.arange(len(TRAITS))).ravel(),
+                             minlength=3 * len(TRAITS)).reshape(len(TRAITS), 3)
+        perc_hist += np.bincount((perc + 101 * np.arange(len(TRAITS))).ravel(),
+                                 minlength=101 * len(TRAITS)).reshape(len(TRAITS), 101)
+        done += k
+    elapsed = time.perf_counter() - started
+
+    return {
+        "respondents": n,
+        "seconds": round(elapsed, 3),
+        "respondents_per_second": round(n / elapsed) if elapsed else None,
+        "archetypes": {
+            role: {f"{archetypes[t][0]} ({t})": round(picks[role][i] / n, 4) for i, t in enumerate(CREATIVE)}
+            for role in picks
+        },
+        "tie_decided": {role: round(ties[role] / n, 4) for role in ties},
+        "all_creative_traits_equal": round(all_equal / n, 4),
+        "bands": {t: dict(zip(BANDS, (bands[i] / n).round(4).tolist())) for i, t in enumerate(TRAITS)},
+        "mean_percentage": {t: round(float((perc_hist[i] * np.arange(101)).sum() / n), 2)
+                            for i, t in enumerate(TRAITS)},
+    }
+
+
+def _item_probs(args):
+    if args.probs_json:
+        with open(args.probs_json) as f:
+            per_trait = json.load(f)
+        default = per_trait.get("default", [0.2] * 5)
+        probs = np.array([per_trait.get(t, default) for t, _ in ITEMS], dtype=np.float64)
+    else:
+        probs = np.tile(np.array([float(p) for p in args.probs.split(",")]), (len(ITEMS), 1))
+    if probs.shape[1] != 5 or (probs < 0).any():
+        raise SystemExit("answer probabilities need five non-negative values")
+    return probs / probs.sum(axis=1, keepdims=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate score and archetype distributions.")
+    parser.add_argument("-n", type=int, default=1_000_000, help="number of synthetic respondents")
+    parser.add_argument("--chunk", type=int, default=250_000, help="respondents per vectorized chunk")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--model", choices=("categorical", "latent"), default="categorical")
+    parser.add_argument("--probs", default="0.2,0.2,0.2,0.2,0.2", help="P(1)..P(5) for every item (categorical)")
+    parser.add_argument("--probs-json", help='per-trait probabilities, e.g. {"Curiosity": [...], "default": [...]}')
+    parser.add_argument("--loading", type=float, default=1.0, help="latent model: weight of the trait level")
+    parser.add_argument("--noise", type=float, default=0.8, help="latent model: per-item noise")
+    args = parser.parse_args(argv)
+    if args.n <= 0 or args.chunk <= 0:
+        parser.error("-n and --chunk must be positive")
+
+    if args.model == "latent":
+        answers_fn = lambda rng, k: latent_answers(rng, k, args.loading, args.noise)
+    else:
+        probs = _item_probs(args)
+        answers_fn = lambda rng, k: categorical_answers(rng, k, probs)
+
+    print(json.dumps(simulate(args.n, answers_fn, args.chunk, args.seed), indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# --------------------------
+# Memory telemetry
+# --------------------------
+# Cheap counters that are always on (live matplotlib figures, sessions seen by
+# this process, results PDF cache hit rates, quiz event buffers) plus optional
+# tracemalloc snapshots. tracemalloc slows every allocation down, so it only
+# starts when CIP_TRACEMALLOC is set (its value is the number of stack frames
+# to keep, default 1).
+#
+# The Streamlit app shows snapshot() under ?telemetry=<CIP_ADMIN_TOKEN>, and
+# api.py serves it at GET /metrics.
+import os
+import threading
+import time
+import tracemalloc
+
+import matplotlib.pyplot as plt
+
+import events
+import pdf_cache
+
+ADMIN_TOKEN = os.environ.get("CIP_ADMIN_TOKEN")
+
+_lock = threading.Lock()
+_sessions = {}          # session id -> last time a rerun was seen
+_previous_snapshot = None
+
+
+def start_tracemalloc():
+    """Start tracemalloc if CIP_TRACEMALLOC is set; safe to call on every rerun."""
+    frames = os.environ.get("CIP_TRACEMALLOC")
+    if frames and not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, int(frames) if frames.isdigit() else 1))
+
+
+def note_session(session_id):
+    """Record that session_id just ran a script rerun."""
+    if session_id is None:
+        return
+    with _lock:
+        _sessions[session_id] = time.time()
+
+
+def forget_session(session_id):
+    with _lock:
+        _sessions.pop(session_id, None)
+
+
+def active_sessions(idle_seconds=300):
+    """Number of sessions that reran within the last idle_seconds."""
+    cutoff = time.time() - idle_seconds
+    with _lock:
+        return sum(1 for seen in _sessions.values() if seen >= cutoff)
+
+
+def _streamlit_session_count():
+    # Streamlit keeps its session manager private; treat it as best-effort.
+    try:
+        from streamlit import runtime
+        if not runtime.exists():
+            return None
+        return runtime.get_instance()._session_mgr.num_sessions()
+    except Exception:
+        return None
+
+
+def is_admin(token):
+    """True if token matches CIP_ADMIN_TOKEN (never true when it is unset)."""
+    return bool(ADMIN_TOKEN) and token == ADMIN_TOKEN
+
+
+def snapshot(limit=10):
+    """
+    Return a JSON-friendly dict of live memory counters. With tracemalloc
+    running it also lists the top allocation sites and the biggest growth
+    since the previous call.
+    """
+    global _previous_snapshot
+
+    with _lock:
+        tracked = len(_sessions)
+    data = {
+        "open_figures": len(plt.get_fignums()),
+        "sessions_tracked": tracked,
+        "sessions_active": active_sessions(),
+        "streamlit_sessions": _streamlit_session_count(),
+        "pdf_cache": pdf_cache.default_cache().stats(),
+        "quiz_events": events.stats(),
+        "tracemalloc": None,
+    }
+
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        snap = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ))
+        top = [{"where": str(s.traceback), "kib": round(s.size / 1024, 1), "count": s.count}
+               for s in snap.statistics("lineno")[:limit]]
+        growth = []
+        with _lock:
+            previous, _previous_snapshot = _previous_snapshot, snap
+        if previous is not None:
+            growth = [{"where": str(d.traceback), "kib_diff": round(d.size_diff / 1024, 1), "count_diff": d.count_diff}
+                      for d in snap.compare_to(previous, "lineno")[:limit] if d.size_diff > 0]
+        data["tracemalloc"] = {
+            "current_kib": round(current / 1024, 1),
+            "peak_kib": round(peak / 1024, 1),
+            "top": top,
+            "growth_since_last": growth,
+        }
+
+    return data
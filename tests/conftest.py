@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# The app is a flat set of modules in the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Module-level paths (checkpoints, archive, item statistics, events) derive from
+# CIP_DATA_DIR at import time, and background writers may flush after a test's
+# own setup is undone, so never let a test run fall back to the repo's data/.
+os.environ["CIP_DATA_DIR"] = tempfile.mkdtemp(prefix="cip-tests-")
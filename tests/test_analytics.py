@@ -0,0 +1,33 @@
+import numpy as np
+
+import analytics
+import archive
+from profile_core import ITEMS, keyed_answers
+
+
+def test_statistics_match_a_full_recompute(tmp_path):
+    rows = np.random.default_rng(0).integers(1, 6, (200, len(ITEMS)), dtype=np.int8)
+    stats = analytics.ItemStatistics()
+    for row in rows[:50]:
+        stats.update(row)
+    stats.update_many(rows[50:])
+    full = analytics.ItemStatistics.from_answers(rows)
+    np.testing.assert_allclose(stats.covariance(), full.covariance())
+    np.testing.assert_allclose(stats.covariance(), np.cov(keyed_answers(rows), rowvar=False), atol=1e-9)
+
+    path = str(tmp_path / "stats.npz")
+    stats.save(path)
+    assert analytics.ItemStatistics.load(path).n == 200
+
+
+def test_failed_writes_do_not_reach_the_participant(tmp_path, monkeypatch, caplog):
+    stats_path = tmp_path / "item_stats.npz"
+    stats_path.write_bytes(b"not an npz file")
+    monkeypatch.setattr(analytics, "STATS_PATH", str(stats_path))
+    monkeypatch.setattr(analytics.record, "__defaults__", (str(stats_path),))
+    monkeypatch.setattr(archive.ResponseArchive.__init__, "__defaults__", (str(tmp_path / "archive"),))
+
+    row = np.full(len(ITEMS), 4, dtype=np.int8)
+    analytics.record_submission(row)  # must not raise
+    assert "could not update item statistics" in caplog.text
+    assert len(archive.ResponseArchive(str(tmp_path / "archive"))) == 1  # the archive is still written
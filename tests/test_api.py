@@ -0,0 +1,106 @@
+import http.client
+import json
+import threading
+
+import pytest
+
+import api
+
+
+@pytest.fixture
+def server():
+    srv = api.ProfileAPIServer(("127.0.0.1", 0), workers=1)
+    thread = threading.Thread(target=srv.serve_forever, daemon=True)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+
+
+def post(conn, path, body):
+    conn.request("POST", path, body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.mark.parametrize("body", ['[1, 2]', '"x"', '{"respondents": {"a": 1}}', '{"answers": [1]}',
+                                  '{"creative_perc": 1, "bigfive_perc": 2}'])
+def test_wrong_shape_is_rejected(server, body):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    status, reply = post(conn, "/score", body)
+    if status == 200:  # per-respondent errors are reported inline
+        assert all("error" in r for r in reply["results"])
+    else:
+        assert status == 400 and "error" in reply
+    # the connection is still usable afterwards
+    conn.request("GET", "/health")
+    assert conn.getresponse().status == 200
+
+
+def test_too_large_body_closes_connection(server, monkeypatch):
+    monkeypatch.setattr(api, "MAX_BODY_BYTES", 10)
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    status, reply = post(conn, "/score", '{"respondents": []}')
+    assert status == 400 and "too large" in reply["error"]
+    assert conn.sock is None or conn.sock.recv(1) == b""  # server closed it
+
+
+def test_score(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    answers = {t: [4] * len(qs) for t, qs in {**api.creative_traits, **api.big_five_traits}.items()}
+    status, reply = post(conn, "/score", json.dumps({"answers": answers}))
+    assert status == 200
+    assert reply["results"][0]["creative_perc"]["Curiosity"] == 75
+
+
+def _first_key(trait):
+    return f"{trait}_{api.creative_traits[trait][0]}"
+
+
+@pytest.mark.parametrize("respondent", [
+    {"responses": {_first_key("Originality"): 9}},
+    {"responses": {_first_key("Originality"): "10"}},
+    {"responses": {_first_key("Originality"): True}},
+    {"responses": {"Originality_not a question": 3}},
+    {"answers": {"Originality": [4.9, 4, 4]}},
+    {"answers": {"Originality": [True, 4, 4]}},
+    {"answers": {"Originality": 4}},
+    {"creative_perc": {t: 500 for t in api.creative_traits}, "bigfive_perc": {t: 50 for t in api.big_five_traits}},
+])
+def test_invalid_answers_are_reported(server, respondent):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    status, reply = post(conn, "/score", json.dumps({"respondents": [respondent]}))
+    assert status == 200
+    assert "error" in reply["results"][0] and "len()" not in reply["results"][0]["error"]
+
+
+def test_labels_and_integers_score_the_same(server):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=10)
+    keys = [f"{t}_{q}" for t, q in api.ITEMS]
+    as_labels = {k: "4 Agree" for k in keys}
+    as_ints = {k: 4 for k in keys}
+    _, reply = post(conn, "/score", json.dumps({"respondents": [{"responses": as_labels}, {"responses": as_ints}]}))
+    first, second = reply["results"]
+    assert first["creative_perc"] == second["creative_perc"]
+    assert max(first["creative_perc"].values()) <= 100
+
+
+def _kill_worker():
+    import os
+    os._exit(1)
+
+
+def test_dead_pdf_worker_returns_500_and_recovers(server, monkeypatch):
+    conn = http.client.HTTPConnection(*server.server_address, timeout=60)
+    monkeypatch.setattr(api.pdf_cache, "_default", api.pdf_cache.PDFCache())
+    monkeypatch.setattr(api.pdf_cache, "render_results_pdf", _kill_worker)
+    body = {"creative_perc": {t: 50 for t in api.creative_traits}, "bigfive_perc": {t: 50 for t in api.big_five_traits}}
+    conn.request("POST", "/pdf", body=json.dumps(body))
+    response = conn.getresponse()
+    assert response.status == 500 and "error" in json.loads(response.read())
+
+    monkeypatch.undo()
+    monkeypatch.setattr(api.pdf_cache, "_default", api.pdf_cache.PDFCache())
+    conn.request("POST", "/pdf", body=json.dumps(body))
+    response = conn.getresponse()
+    assert response.status == 200 and response.read().startswith(b"%PDF")
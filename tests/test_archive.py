@@ -0,0 +1,42 @@
+import numpy as np
+
+from archive import COLUMNS, ResponseArchive
+from profile_core import ITEMS, score_matrix
+
+
+def test_append_and_read_back(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    rows = np.random.default_rng(0).integers(1, 6, (5, len(ITEMS)), dtype=np.int8)
+    assert archive.append(rows[0]) == 1
+    assert archive.append(rows[1:], timings=np.ones((4, len(ITEMS)))) == 5
+    np.testing.assert_array_equal(archive.answers, rows)
+    np.testing.assert_array_equal(archive.percentages, score_matrix(rows))
+    assert np.isnan(archive.timings[0]).all() and (archive.timings[1:] == 1).all()
+
+
+def test_torn_append_is_truncated(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    first = np.full(len(ITEMS), 3, dtype=np.int8)
+    archive.append(first)
+    # an interrupted append: a partial row in the answers column and in another column
+    with open(archive._file("answers"), "ab") as f:
+        f.write(bytes([5] * 10))
+    with open(archive._file("timings"), "ab") as f:
+        f.write(b"\0" * (len(ITEMS) * 4 + 7))
+    assert len(archive) == 1
+
+    archive.append(np.ones(len(ITEMS), dtype=np.int8))
+    assert len(archive) == 2
+    np.testing.assert_array_equal(archive.answers, [first, np.ones(len(ITEMS))])
+    for name, (dtype, width) in COLUMNS.items():
+        assert (tmp_path / f"{name}.{np.dtype(dtype).name}").stat().st_size == 2 * np.dtype(dtype).itemsize * width
+
+
+def test_rescore_and_norms(tmp_path):
+    archive = ResponseArchive(str(tmp_path))
+    rows = np.random.default_rng(1).integers(1, 6, (50, len(ITEMS)), dtype=np.int8)
+    archive.append(rows)
+    np.testing.assert_array_equal(archive.rescore(chunk_rows=7), score_matrix(rows))
+    norms = archive.norms(chunk_rows=7)
+    assert all(cdf[-1] == 1.0 for cdf in norms.values())
+    assert archive.cohort_stats()["n"] == 50
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+
+pytest.importorskip("streamlit")
+from streamlit.testing.v1 import AppTest
+
+import checkpoint
+import events
+import session_store
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = session_store.WriteBehind(session_store.FileBackend(str(tmp_path / "checkpoints")))
+    monkeypatch.setattr(session_store, "_store", store)
+    monkeypatch.setattr(events, "EVENTS_PATH", str(tmp_path / "events.bin"))
+    with checkpoint._lock:
+        checkpoint._live.clear()
+    yield
+    # write what the background threads still hold while the paths point here
+    store.flush()
+    events.flush()
+
+
+def start_quiz(answers=3):
+    at = AppTest.from_file(APP, default_timeout=60).run()
+    at.button(key="intro_start_quiz").click().run()
+    for _ in range(answers):
+        at.radio[0].set_value("4 Agree").run()
+        [b for b in at.button if b.label == "Next"][0].click().run()
+    assert not at.exception
+    return at
+
+
+def test_idle_session_is_evicted_and_restored():
+    at = start_quiz()
+    token = at.session_state.resume_token
+    question = at.session_state.current_question
+    responses = {k: v for k, v in at.session_state.responses.items() if v}
+
+    # the rerun that tracked the session is over; its state must still be reachable
+    assert checkpoint.sweep(ttl=-1) == 1
+    for key in checkpoint.QUIZ_KEYS:
+        assert key not in at.session_state
+    checkpoint.get_store().flush()
+
+    restored = AppTest.from_file(APP, default_timeout=60)
+    restored.query_params["resume"] = token
+    restored.run()
+    assert not restored.exception
+    assert restored.session_state.page == "quiz"
+    assert restored.session_state.current_question == question
+    assert {k: v for k, v in restored.session_state.responses.items() if v} == responses
+
+
+def test_active_session_is_kept():
+    at = start_quiz(answers=1)
+    assert checkpoint.sweep(ttl=3600) == 0
+    assert at.session_state.page == "quiz"
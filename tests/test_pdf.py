@@ -0,0 +1,44 @@
+import pytest
+from reportlab import rl_config
+
+import pdf_cache
+from profile_core import create_results_pdf, fit_results_pdf, pdf_size_report, trait_descriptions, archetypes
+
+CREATIVE = {"Originality": 75, "Curiosity": 92, "Risk-Taking": 67, "Imagination": 75,
+            "Discipline": 33, "Collaboration": 92}
+BIGFIVE = {"Openness": 83, "Conscientiousness": 50, "Extraversion": 75, "Agreeableness": 100, "Neuroticism": 25}
+
+
+@pytest.fixture
+def optimized(monkeypatch):
+    monkeypatch.setenv("CIP_PDF_OPTIMIZE", "1")  # seen by the spawned render workers
+    monkeypatch.setattr(pdf_cache, "OPTIMIZE", True)
+    monkeypatch.setattr(pdf_cache, "_pool", None)
+    monkeypatch.setattr(pdf_cache, "_academic", None)
+    monkeypatch.setattr(pdf_cache, "_default", pdf_cache.PDFCache())
+    yield
+    pdf_cache._pool.shutdown()
+
+
+def test_optimized_renders_are_isolated_in_workers(optimized):
+    default = create_results_pdf(CREATIVE, BIGFIVE, trait_descriptions, archetypes).getvalue()
+    pdf = pdf_cache.results_pdf(CREATIVE, BIGFIVE)
+    assert pdf.startswith(b"%PDF") and b"ASCII85Decode" not in pdf
+    assert len(pdf) < len(default) / 2
+    assert b"ASCII85Decode" not in pdf_cache.academic_pdf()
+    assert rl_config.useA85  # this process keeps ReportLab's default
+
+
+def test_size_budget():
+    pdf, report = fit_results_pdf(CREATIVE, BIGFIVE, trait_descriptions, archetypes, max_bytes=40000)
+    assert report["within_budget"] and len(pdf) <= 40000
+    assert report["total"] == len(pdf) == sum(v for k, v in pdf_size_report(pdf).items() if k != "total")
+    _, report = fit_results_pdf(CREATIVE, BIGFIVE, trait_descriptions, archetypes, max_bytes=1000)
+    assert not report["within_budget"]
+
+
+def test_compact_charts_keep_process_encoding():
+    default = create_results_pdf(CREATIVE, BIGFIVE, trait_descriptions, archetypes).getvalue()
+    compact = create_results_pdf(CREATIVE, BIGFIVE, trait_descriptions, archetypes, compact_charts=True).getvalue()
+    assert len(compact) < len(default) / 2
+    assert b"ASCII85Decode" in compact  # raw streams only come from use_raw_streams() workers
@@ -0,0 +1,87 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from pdf_cache import PDFCache, cache_key
+
+
+def profile(i):
+    return {"Originality": i}, {"Openness": 50}
+
+
+def fake_render(size=1000):
+    calls = []
+
+    def render(creative_perc, bigfive_perc):
+        calls.append(creative_perc["Originality"])
+        return b"%PDF" + bytes([creative_perc["Originality"] % 256]) * size
+    return render, calls
+
+
+def test_memory_lru_is_bounded():
+    cache = PDFCache(max_items=3)
+    render, calls = fake_render()
+    for i in range(5):
+        cache.get_or_render(*profile(i), render=render)
+    cache.get_or_render(*profile(4), render=render)  # hit
+    assert cache.stats()["memory_items"] == 3
+    assert cache.get(cache_key(*profile(0))) is None  # oldest evicted
+    assert calls == [0, 1, 2, 3, 4]
+    assert cache.stats()["hits_memory"] == 1 and cache.stats()["misses"] == 5
+
+
+def test_disk_tier_is_trimmed_and_counted_once(tmp_path):
+    cache = PDFCache(max_items=1, disk_dir=str(tmp_path), disk_max_bytes=5000)
+    render, _ = fake_render(size=1000)
+    key = cache_key(*profile(1))
+    cache.put(key, render(*profile(1)))
+    cache.put(key, render(*profile(1)))  # rewriting a key doesn't grow the counter
+    assert cache.stats()["disk_bytes"] == 1004
+
+    for i in range(2, 10):
+        cache.get_or_render(*profile(i), render=render)
+    on_disk = sum(p.stat().st_size for p in tmp_path.glob("*.pdf"))
+    assert on_disk <= 5000
+    assert cache.stats()["disk_bytes"] == on_disk
+
+    fresh = PDFCache(max_items=1, disk_dir=str(tmp_path), disk_max_bytes=5000)
+    assert fresh.get(cache_key(*profile(9))) is not None  # shared with other processes
+    assert fresh.stats()["hits_disk"] == 1
+
+
+def test_concurrent_renders_of_one_key_run_once():
+    cache = PDFCache()
+    render, calls = fake_render()
+    started = threading.Event()
+
+    def slow_render(c, b):
+        started.set()
+        time.sleep(0.2)
+        return render(c, b)
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(lambda _: cache.get_or_render(*profile(7), render=slow_render), range(8)))
+    assert calls == [7]
+    assert len(set(results)) == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_submitted_renders_are_shared_and_cached():
+    cache = PDFCache()
+    submitted = []
+
+    def submit(c, b):
+        future = Future()
+        submitted.append(future)
+        return future
+
+    first = cache.get_or_submit(*profile(3), submit)
+    second = cache.get_or_submit(*profile(3), submit)
+    assert first is second and len(submitted) == 1
+    first.set_result(b"%PDF-3")
+    assert cache.get_or_submit(*profile(3), submit) == b"%PDF-3"
+    assert len(submitted) == 1 and cache.stats()["misses"] == 1
+
+    failed = cache.get_or_submit(*profile(4), submit)
+    failed.set_exception(RuntimeError("worker died"))
+    assert cache.get_or_submit(*profile(4), submit) is not failed  # a failed render is retried
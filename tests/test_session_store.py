@@ -0,0 +1,184 @@
+import os
+import socketserver
+import threading
+
+import pytest
+
+import checkpoint
+import session_store
+from session_store import FileBackend, RedisBackend, SQLiteBackend, WriteBehind
+
+
+# --------------------------
+# Local Redis stand-in
+# --------------------------
+class _RESPHandler(socketserver.StreamRequestHandler):
+    """Just enough of the Redis protocol for RedisBackend: AUTH, SELECT, GET, SET [EX], DEL."""
+
+    def _command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        assert line[:1] == b"*"
+        args = []
+        for _ in range(int(line[1:-2])):
+            n = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(n + 2)[:-2])
+        return args
+
+    def handle(self):
+        db = self.server.dbs.setdefault(0, {})
+        while True:
+            args = self._command()
+            if args is None:
+                return
+            name = args[0].upper()
+            self.server.commands.append(name)
+            if name == b"AUTH":
+                reply = b"+OK\r\n" if args[1] == self.server.password else b"-ERR invalid password\r\n"
+            elif name == b"SELECT":
+                if int(args[1]) >= 16:
+                    reply = b"-ERR DB index is out of range\r\n"
+                else:
+                    db = self.server.dbs.setdefault(int(args[1]), {})
+                    reply = b"+OK\r\n"
+            elif name == b"GET":
+                value = db.get(args[1])
+                reply = b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+            elif name == b"SET":
+                db[args[1]] = args[2]
+                self.server.expiry[args[1]] = int(args[4]) if len(args) > 4 else None
+                reply = b"+OK\r\n"
+            elif name == b"DEL":
+                reply = b":%d\r\n" % sum(db.pop(k, None) is not None for k in args[1:])
+            else:
+                reply = b"-ERR unknown command\r\n"
+            self.wfile.write(reply)
+
+
+class FakeRedis(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), _RESPHandler)
+        self.password = password.encode() if password else None
+        self.dbs, self.expiry, self.commands = {}, {}, []
+
+
+@pytest.fixture
+def fake_redis():
+    server = FakeRedis(password="s3cret")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_redis_backend_round_trip(fake_redis):
+    host, port = fake_redis.server_address
+    backend = RedisBackend(f"redis://:s3cret@{host}:{port}/2", expire_seconds=60)
+    blob = bytes(range(256))  # binary-safe
+    backend.put_many({"tokenAAAA": blob, "tokenBBBB": b"x"})
+    assert backend.get("tokenAAAA") == blob
+    assert fake_redis.dbs[2][b"cip:session:tokenBBBB"] == b"x"
+    assert fake_redis.expiry[b"cip:session:tokenAAAA"] == 60
+    backend.delete("tokenAAAA")
+    assert backend.get("tokenAAAA") is None
+    assert fake_redis.commands[:2] == [b"AUTH", b"SELECT"]
+
+
+def test_redis_backend_reconnects(fake_redis):
+    host, port = fake_redis.server_address
+    backend = RedisBackend(f"redis://:s3cret@{host}:{port}/0")
+    backend.put_many({"tokenAAAA": b"1"})
+    backend._sock.close()  # simulate a dropped connection
+    assert backend.get("tokenAAAA") == b"1"
+
+
+def test_redis_backend_error(fake_redis):
+    host, port = fake_redis.server_address
+    with pytest.raises(session_store.RedisError):
+        RedisBackend(f"redis://:wrong@{host}:{port}/0").get("tokenAAAA")
+
+
+def test_failed_setup_never_leaves_a_connection(fake_redis):
+    host, port = fake_redis.server_address
+    backend = RedisBackend(f"redis://:s3cret@{host}:{port}/99")
+    for _ in range(2):
+        with pytest.raises(session_store.RedisError):
+            backend.put_many({"tokenAAAA": b"1"})
+        assert backend._sock is None
+    assert not fake_redis.dbs.get(0)  # nothing landed in the default db
+
+
+# --------------------------
+# Local backends
+# --------------------------
+@pytest.mark.parametrize("make", [lambda p: FileBackend(str(p / "checkpoints")),
+                                  lambda p: SQLiteBackend(str(p / "sessions.sqlite3"))])
+def test_local_backends(tmp_path, make):
+    backend = make(tmp_path)
+    backend.put_many({"tokenAAAA": b"\x00\x01", "tokenBBBB": b"2"})
+    backend.put_many({"tokenAAAA": b"3"})
+    assert backend.get("tokenAAAA") == b"3"
+    backend.delete("tokenBBBB")
+    assert backend.get("tokenBBBB") is None
+
+
+# --------------------------
+# Batched writes
+# --------------------------
+class FlakyBackend(FileBackend):
+    fail = True
+
+    def put_many(self, items):
+        if self.fail:
+            raise ConnectionError("backend down")
+        super().put_many(items)
+
+
+def test_failed_flush_keeps_writes(tmp_path):
+    backend = FlakyBackend(str(tmp_path))
+    store = WriteBehind(backend, flush_interval=3600)
+    with pytest.raises(ConnectionError):
+        store.put("tokenAAAA", b"1", flush=True)
+    assert store.get("tokenAAAA") == b"1"  # still served from the queue
+    backend.fail = False
+    store.flush()
+    assert backend.get("tokenAAAA") == b"1"
+
+
+def test_checkpoint_save_survives_backend_outage(tmp_path, monkeypatch, caplog):
+    backend = FlakyBackend(str(tmp_path))
+    monkeypatch.setattr(session_store, "_store", WriteBehind(backend, flush_interval=3600))
+    state = {"page": "results", "current_question": 32, "shuffled_questions": [], "responses": {}}
+    assert checkpoint.save("tokenAAAA", state, flush=True) is False
+    assert "could not save quiz checkpoint" in caplog.text
+    backend.fail = False  # let the queued write land instead of failing again at exit
+
+
+@pytest.mark.parametrize("make", [lambda p: FileBackend(str(p / "checkpoints")),
+                                  lambda p: SQLiteBackend(str(p / "sessions.sqlite3"))])
+def test_prune_removes_only_expired_checkpoints(tmp_path, make, monkeypatch):
+    backend = make(tmp_path)
+    monkeypatch.setattr(session_store.time, "time", lambda: 1_000.0)
+    backend.put_many({"tokenOLD0": b"1"})
+    if isinstance(backend, FileBackend):
+        os.utime(backend._file("tokenOLD0"), (1_000.0, 1_000.0))
+    monkeypatch.undo()
+    backend.put_many({"tokenNEW0": b"2"})
+    assert backend.prune(older_than=2_000.0) == 1
+    assert backend.get("tokenOLD0") is None
+    assert backend.get("tokenNEW0") == b"2"
+
+
+class DownBackend(FileBackend):
+    def get(self, token):
+        raise ConnectionError("backend down")
+
+
+def test_checkpoint_load_survives_backend_outage(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(session_store, "_store", WriteBehind(DownBackend(str(tmp_path)), flush_interval=3600))
+    assert checkpoint.load("tokenAAAA") is None
+    assert "could not load quiz checkpoint" in caplog.text
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import simulate
+from profile_core import ANSWER_LABELS, ITEMS, TRAITS, interpret_profile, score_matrix, score_responses
+
+
+def test_vectorized_rules_match_the_results_page():
+    rng = np.random.default_rng(7)
+    # mostly 2-4 answers so ties between creative traits are common
+    answers = np.concatenate([simulate.categorical_answers(rng, 10_000, np.full((len(ITEMS), 5), 0.2)),
+                              np.clip(rng.integers(2, 5, (10_000, len(ITEMS))), 1, 5).astype(np.int8)])
+    perc = score_matrix(answers)
+    top, sub, growth, _ = simulate.assign_archetypes(perc[:, :simulate.N_CREATIVE])
+
+    for i, row in enumerate(answers):
+        responses = {f"{t}_{q}": ANSWER_LABELS[a - 1] for (t, q), a in zip(ITEMS, row)}
+        creative_perc, bigfive_perc = score_responses(responses)
+        assert [*creative_perc.values(), *bigfive_perc.values()] == perc[i].tolist()
+        profile = interpret_profile(creative_perc, bigfive_perc)
+        assert profile["primary"]["trait"] == simulate.CREATIVE[top[i]]
+        assert profile["sub"]["trait"] == simulate.CREATIVE[sub[i]]
+        assert profile["growth"]["trait"] == simulate.CREATIVE[growth[i]]
+    assert list(creative_perc) + list(bigfive_perc) == TRAITS
+
+
+def test_report_shares_sum_to_one():
+    report = simulate.simulate(1000, lambda rng, k: simulate.latent_answers(rng, k), chunk=300, seed=1)
+    for role, shares in report["archetypes"].items():
+        assert sum(shares.values()) == pytest.approx(1, abs=1e-3)
+
+
+def test_empty_simulation_is_rejected():
+    with pytest.raises(ValueError):
+        simulate.simulate(0, simulate.latent_answers)
+    with pytest.raises(SystemExit):
+        simulate.main(["-n", "0"])